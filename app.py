@@ -116,18 +116,20 @@ except ImportError as e:
 
 # データローダーのインポート
 try:
-    from data.loader import load_nba_data
+    from data.loader import (
+        load_nba_data, get_dataset_record_counts, refresh_loaded_data, describe_refresh_changes, select_seasons
+    )
     DATA_LOADER_AVAILABLE = True
 except ImportError:
     # データローダーがない場合はサンプルデータを使用
     from data.sample_data import create_sample_data
     DATA_LOADER_AVAILABLE = False
 
-def load_data_safely():
-    """安全なデータ読み込み"""
+def load_data_safely(seasons=None):
+    """安全なデータ読み込み（seasons: シーズン・範囲、Noneは最新シーズン）"""
     try:
         if DATA_LOADER_AVAILABLE:
-            return load_nba_data()
+            return load_nba_data(seasons=seasons)
         else:
             return create_sample_data()
     except Exception as e:
@@ -204,9 +206,12 @@ def main():
         """)
         return
     
+    # シーズン別データがあればシーズン（範囲）を選択（既定は最新シーズン）
+    seasons = select_seasons() if DATA_LOADER_AVAILABLE else None
+    
     # データ読み込み（キャッシュ付き）
     with st.spinner("📊 データを読み込み中..."):
-        data = load_data_safely()
+        data = load_data_safely(seasons)
     
     # ナビゲーション
     st.sidebar.title("📊 Navigation")
@@ -259,9 +264,13 @@ def main():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("🔄 データ再読み込み"):
-            st.cache_data.clear()
-            st.rerun()
+        # ページがデータを読む前に反映するため、再読み込みはコールバックで行う
+        st.button("🔄 データ再読み込み", on_click=handle_data_refresh, args=(data,))
+        
+        changes = st.session_state.pop('data_refresh_changes', None)
+        if changes is not None:
+            for message in describe_refresh_changes(changes) or ["更新されたデータはありません"]:
+                st.caption(message)
     
     with col2:
         if IS_APP_RUNNER:
@@ -272,20 +281,34 @@ def main():
     with col3:
         st.write(f"⏰ {datetime.now().strftime('%H:%M:%S')}")
 
+def handle_data_refresh(data):
+    """再読み込みボタンのコールバック（次の実行でページを描画する前に呼ばれる）"""
+    if DATA_LOADER_AVAILABLE:
+        # 更新されたファイルのみ反映（変更履歴があれば差分だけを適用）
+        st.session_state['data_refresh_changes'] = refresh_loaded_data(data)
+    else:
+        st.cache_data.clear()
+
 def display_data_info(data):
     """データ情報表示（App Runner最適化）"""
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 📅 Data Info")
     st.sidebar.info(f"最終更新: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     
-    # データセット情報（簡潔に表示）
+    # データセット情報（簡潔に表示・遅延読み込み中のデータセットは読み込まない）
+    if DATA_LOADER_AVAILABLE:
+        record_counts = get_dataset_record_counts(data)
+    else:
+        record_counts = {key: len(df) for key, df in data.items()}
+    
     total_records = 0
-    for key, df in data.items():
-        if not df.empty:
-            records = len(df)
+    for key, records in record_counts.items():
+        if records is None:
+            # ソースファイルはあるが未読み込みで件数不明
+            st.sidebar.success(f"✅ {key}: 未読み込み")
+        elif records > 0:
             total_records += records
-            if records > 0:
-                st.sidebar.success(f"✅ {key}: {records}")
+            st.sidebar.success(f"✅ {key}: {records}")
         else:
             st.sidebar.warning(f"❌ {key}: Empty")
     
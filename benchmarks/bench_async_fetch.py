@@ -0,0 +1,76 @@
+"""
+Basketball-Reference テーブル取得の逐次版と非同期版の比較
+
+ローカルのフィクスチャサーバー（応答遅延付き）に対して、
+従来の逐次取得と AsyncFetcher による並行取得の所要時間を計測する。
+
+実行方法:
+    python benchmarks/bench_async_fetch.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scraper'))
+
+from fetcher import AsyncFetcher
+from nba_data_scraping import build_scraping_targets, scrape_basketball_reference_tables
+from fixture_server import FixtureServer, make_stats_page
+
+SEASONS = range(2016, 2026)
+LATENCY = 0.3  # 1リクエストあたりの応答遅延（秒）
+
+def make_pages():
+    """全シーズン・全テーブル分のフィクスチャHTML"""
+    pages = {}
+    for i, target in enumerate(build_scraping_targets('', SEASONS)):
+        pages[target['url']] = make_stats_page(rows=200, seed=i)
+    return pages
+
+def run_sequential(base_url):
+    """従来方式：1件ずつ取得"""
+    session = requests.Session()
+    for target in build_scraping_targets(base_url, SEASONS):
+        session.get(target['url']).raise_for_status()
+
+async def run_async_fetch_only(base_url, requests_per_second):
+    """AsyncFetcher による並行取得（取得のみ）"""
+    urls = [target['url'] for target in build_scraping_targets(base_url, SEASONS)]
+    with AsyncFetcher(requests_per_second=requests_per_second, burst=4, max_concurrency=8) as fetcher:
+        responses = await fetcher.fetch_all(urls)
+    assert not any(isinstance(response, Exception) for response in responses)
+
+async def run_async(base_url, output_dir, requests_per_second):
+    """AsyncFetcher による並行取得（パース・保存を含む）"""
+    targets = build_scraping_targets(base_url, SEASONS)
+    with AsyncFetcher(requests_per_second=requests_per_second, burst=4, max_concurrency=8) as fetcher:
+        return await scrape_basketball_reference_tables(targets, output_dir, fetcher)
+
+def main():
+    pages = make_pages()
+    print(f"{len(pages)} pages, latency {LATENCY}s")
+
+    with FixtureServer(pages, latency=LATENCY) as server:
+        start = time.perf_counter()
+        run_sequential(server.base_url)
+        print(f"sequential (fetch only): {time.perf_counter() - start:.2f}s")
+
+        for requests_per_second in [5, 20]:
+            start = time.perf_counter()
+            asyncio.run(run_async_fetch_only(server.base_url, requests_per_second))
+            print(f"async {requests_per_second} req/s (fetch only): {time.perf_counter() - start:.2f}s")
+
+            with tempfile.TemporaryDirectory() as output_dir:
+                start = time.perf_counter()
+                results = asyncio.run(run_async(server.base_url, output_dir, requests_per_second))
+                elapsed = time.perf_counter() - start
+            assert len(results) == len(pages)
+            print(f"async {requests_per_second} req/s (fetch + parse + save): {elapsed:.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+filter_multi_team_records のマイクロベンチマーク
+
+実行方法:
+    python benchmarks/bench_filter_multi_team_records.py
+"""
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import NBA_TEAMS
+from utils.helpers import filter_multi_team_records
+
+ROW_COUNTS = [500, 50_000, 5_000_000]
+
+def legacy_filter_multi_team_records(df, team_columns=['Team', 'Tm']):
+    """旧実装（列ごとに文字列変換＋正規表現＋コピー）"""
+    df_filtered = df.copy()
+    
+    for col in team_columns:
+        if col in df_filtered.columns:
+            df_filtered = df_filtered[~df_filtered[col].astype(str).str.match(r'^\d+TM$', na=False)]
+    
+    return df_filtered
+
+def make_player_frame(rows, seed=42):
+    """約1割が移籍レコード（2TM/3TM）の選手スタッツを生成"""
+    rng = np.random.default_rng(seed)
+    teams = np.array(list(NBA_TEAMS.keys()) + ['2TM', '3TM', 'TOT'])
+    weights = np.r_[np.full(len(teams) - 3, 0.9 / (len(teams) - 3)), 0.06, 0.03, 0.01]
+    
+    return pd.DataFrame({
+        'Player': [f'Player {i}' for i in rng.integers(0, max(rows // 2, 1), rows)],
+        'Team': rng.choice(teams, rows, p=weights),
+        'G': rng.integers(1, 83, rows).astype('int16'),
+        'PTS': rng.uniform(0, 35, rows).astype('float32')
+    })
+
+def measure(func, df, repeat):
+    """最良値（秒）を計測"""
+    return min(timeit.repeat(lambda: func(df), number=1, repeat=repeat))
+
+def main():
+    """メイン処理"""
+    print(f"{'rows':>10} {'dtype':>9} {'legacy (ms)':>12} {'current (ms)':>13} {'speedup':>8}")
+    
+    for rows in ROW_COUNTS:
+        object_df = make_player_frame(rows)
+        category_df = object_df.assign(Team=object_df['Team'].astype('category'))
+        repeat = 5 if rows < 1_000_000 else 2
+        
+        for label, df in [('object', object_df), ('category', category_df)]:
+            assert legacy_filter_multi_team_records(df).equals(filter_multi_team_records(df))
+            
+            legacy = measure(legacy_filter_multi_team_records, df, repeat)
+            current = measure(filter_multi_team_records, df, repeat)
+            print(f"{rows:>10,} {label:>9} {legacy * 1000:>12.2f} {current * 1000:>13.2f} {legacy / current:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+データ更新時の全件読み込みと変更履歴（差分）適用の比較
+
+シーズン途中の日次更新を想定し、数千行の選手スタッツのうち数行が変わった状態で
+共有ストアへの反映にかかる時間と、変更履歴のサイズを計測する。
+差分適用の結果が全件読み込みと一致することも確認する。
+
+実行方法:
+    python benchmarks/bench_incremental_refresh.py
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scraper'))
+
+from config import NBA_TEAMS
+from changelog import get_changelog_path, save_table_with_changelog
+from data.loader import load_dataset_file_shared, load_dataset_file
+from data.store import get_shared_store
+
+ROW_COUNTS = [700, 5000]
+CHANGED_ROWS = 5
+
+def make_per_game_frame(rows, seed=42):
+    """Basketball-Referenceの per_game 形式の選手スタッツ"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Rk': np.arange(1, rows + 1),
+        'Player': [f'Player {i}' for i in range(rows)],
+        'Age': rng.integers(19, 40, rows),
+        'Team': rng.choice(list(NBA_TEAMS.keys()), rows),
+        'Pos': rng.choice(['PG', 'SG', 'SF', 'PF', 'C'], rows),
+        'G': rng.integers(1, 83, rows),
+        'MP': rng.uniform(5, 38, rows).round(1),
+        'PTS': rng.uniform(0, 35, rows).round(1),
+        'TRB': rng.uniform(0, 15, rows).round(1),
+        'AST': rng.uniform(0, 12, rows).round(1)
+    })
+
+def main():
+    for rows in ROW_COUNTS:
+        with tempfile.TemporaryDirectory() as data_dir:
+            os.makedirs(os.path.join(data_dir, 'season=2025'))
+            filepath = os.path.join(data_dir, 'season=2025', 'per_game.json')
+
+            df = make_per_game_frame(rows)
+            save_table_with_changelog(df, filepath)
+            load_dataset_file_shared(filepath, 'per_game')
+
+            # 数試合分の更新（スタッツの変化・新規選手・移籍）
+            updated = df.copy()
+            updated.loc[:CHANGED_ROWS - 1, 'G'] += 1
+            updated.loc[:CHANGED_ROWS - 1, 'PTS'] += 0.1
+            updated.loc[rows // 2, 'Team'] = 'TOT'
+            updated = pd.concat([updated, make_per_game_frame(1, seed=7).assign(Player='Rookie')], ignore_index=True)
+            time.sleep(0.01)
+            save_table_with_changelog(updated, filepath)
+
+            start = time.perf_counter()
+            delta = load_dataset_file_shared(filepath, 'per_game')
+            delta_elapsed = time.perf_counter() - start
+
+            get_shared_store().clear()
+            os.remove(os.path.join(data_dir, 'season=2025', '.cache', 'per_game.meta.json'))
+            start = time.perf_counter()
+            full = load_dataset_file_shared(filepath, 'per_game')
+            full_elapsed = time.perf_counter() - start
+
+            assert delta.equals(full)
+            assert delta.equals(load_dataset_file(filepath, 'per_game').reset_index(drop=True))
+
+            print(f"{rows} rows: full reload {full_elapsed * 1000:.1f} ms "
+                  f"({os.path.getsize(filepath) // 1024} KB JSON), "
+                  f"delta {delta_elapsed * 1000:.1f} ms "
+                  f"({os.path.getsize(get_changelog_path(filepath)) / 1024:.1f} KB changelog)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+process_traded_players のマイクロベンチマーク（選手ごとの groupby ループと、並べ替え + drop_duplicates）
+
+複数シーズン分のサラリー履歴を想定し、移籍選手（TOT行・複数チーム）を含む契約レコードで
+旧実装と処理時間を比較する。残るレコードが旧実装と一致することも確認する。
+
+実行方法:
+    python benchmarks/bench_process_traded_players.py
+"""
+import contextlib
+import io
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scraper'))
+
+from config import NBA_TEAMS
+from nba_salary_scraper import NBAPlayerSalaryScraper
+
+ROW_COUNTS = [600, 20_000, 60_000]
+
+def legacy_process_traded_players(df):
+    """旧実装（選手ごとに groupby → Series のリスト → DataFrame を再構築）"""
+    processed_players = []
+    for player_name, group in df.groupby('player_name'):
+        if len(group) == 1:
+            processed_players.append(group.iloc[0])
+        else:
+            print(f"   Found traded player: {player_name} ({len(group)} teams)")
+            non_tot_teams = group[group['team'] != 'TOT']
+            if not non_tot_teams.empty:
+                latest_record = non_tot_teams.loc[non_tot_teams['current_salary'].idxmax()]
+            else:
+                latest_record = group.iloc[0]
+            processed_players.append(latest_record)
+    return pd.DataFrame(processed_players)
+
+def make_salary_records(rows, seed=42):
+    """約3割が移籍選手（複数チーム・TOT行あり）の契約レコードを生成"""
+    rng = np.random.default_rng(seed)
+    players = rng.integers(0, int(rows * 0.75), rows)
+    teams = np.array(list(NBA_TEAMS.keys()) + ['TOT'])
+    return pd.DataFrame({
+        'player_name': [f'Player {i}' for i in players],
+        'team': rng.choice(teams, rows, p=np.r_[np.full(len(teams) - 1, 0.9 / (len(teams) - 1)), 0.1]),
+        # 同額の契約も含める（同額なら先に出てきた行が残る）
+        'current_salary': rng.integers(1, 50, rows) * 1_000_000,
+        'rank': np.arange(1, rows + 1),
+        'source': 'hoopshype'
+    })
+
+def main():
+    scraper = NBAPlayerSalaryScraper(use_http_cache=False)
+
+    for rows in ROW_COUNTS:
+        df = make_salary_records(rows)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy_df = legacy_process_traded_players(df)
+            fast_df = scraper.process_traded_players(df)
+
+        pd.testing.assert_frame_equal(legacy_df.infer_objects(), fast_df, check_dtype=False)
+
+        number = 3
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy = timeit.timeit(lambda: legacy_process_traded_players(df), number=number) / number
+            fast = timeit.timeit(lambda: scraper.process_traded_players(df), number=number) / number
+
+        summary = scraper.traded_players_summary
+        print(f"{rows:>6} rows ({summary['traded_players']} traded players): "
+              f"groupby loop {legacy * 1000:.1f} ms, vectorized {fast * 1000:.2f} ms, x{legacy / fast:.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+障害を注入したフィクスチャサーバーに対する、サラリー取得とテーブル取得の耐障害性の比較
+
+ソースごとに別のフィクスチャサーバー（別ホスト相当）を立て、429 / 503・接続断・応答遅延を
+注入して次の2つを比べる。
+- 従来方式: 各ソース1回だけ取得し、失敗したら2秒待って次のソースへ
+- 再試行（ジッター付き指数バックオフ・Retry-After）+ ホスト単位のサーキットブレーカー + ソースの並行取得
+
+実行方法:
+    python benchmarks/bench_resilient_fetch.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from contextlib import ExitStack
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scraper'))
+
+from fetcher import AsyncFetcher, RetryPolicy
+from nba_salary_scraper import NBAPlayerSalaryScraper
+from fixture_server import FixtureServer, make_contracts_page, make_salary_page, make_stats_page
+
+HOOPSHYPE_PATH = '/salaries/players/'
+BREF_PATH = '/contracts/players.html'
+ESPN_PATH = '/nba/salaries'
+
+# 検証用に待機を短くした再試行方針（乱数は固定）
+def make_retry_policy(max_retries=3, budget=10):
+    return RetryPolicy(max_retries=max_retries, backoff_base=0.25, backoff_max=2, budget=budget,
+                       rng=random.Random(0))
+
+def legacy_get_all_salaries(scraper):
+    """従来方式（各ソース1回、失敗したら2秒待って次のソース）"""
+    for i, source in enumerate([scraper.scrape_hoopshype, scraper.scrape_basketball_reference, scraper.scrape_espn]):
+        if i:
+            time.sleep(2)
+        df = source()
+        if df is not None:
+            return df
+    return None
+
+@contextlib.contextmanager
+def salary_servers(hoopshype=None, bref=None, espn=None):
+    """ソースごとのフィクスチャサーバー（引数: FixtureServer に渡す latency / faults）"""
+    pages = {
+        'hoopshype': {HOOPSHYPE_PATH: make_salary_page(rows=300)},
+        'basketball_reference': {BREF_PATH: make_contracts_page(rows=300)},
+        # ESPN は静的ページからは取得できない（常に None）
+        'espn': {ESPN_PATH: '<html><body><table></table></body></html>'}
+    }
+    paths = {'hoopshype': HOOPSHYPE_PATH, 'basketball_reference': BREF_PATH, 'espn': ESPN_PATH}
+    options = {'hoopshype': hoopshype or {}, 'basketball_reference': bref or {}, 'espn': espn or {}}
+
+    with ExitStack() as stack:
+        servers = {
+            source: stack.enter_context(FixtureServer(pages[source], **options[source]))
+            for source in pages
+        }
+        urls = {source: server.base_url + paths[source] for source, server in servers.items()}
+        yield servers, urls
+
+def run_quietly(func, *args, **kwargs):
+    """(結果, 秒数)（スクレイパーの進捗表示は捨てる）"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def describe(df):
+    return 'no data' if df is None else f"{df['source'].iloc[0]} ({len(df)} players)"
+
+def compare_salary_scenario(name, timeout=30, **server_options):
+    """1つの障害シナリオで従来方式と並行取得を比較"""
+    print(f"{name}:")
+    for label in ['serial, single attempt', 'retry + race']:
+        # サーバーの障害リストは消費されるため、方式ごとに立て直す
+        with salary_servers(**server_options) as (_, urls):
+            if label == 'retry + race':
+                scraper = NBAPlayerSalaryScraper(use_http_cache=False, source_urls=urls,
+                                                 retry_policy=make_retry_policy())
+                df, elapsed = run_quietly(scraper.get_all_salaries, timeout=timeout)
+            else:
+                scraper = NBAPlayerSalaryScraper(use_http_cache=False, source_urls=urls,
+                                                 retry_policy=make_retry_policy(max_retries=0))
+                df, elapsed = run_quietly(legacy_get_all_salaries, scraper)
+        print(f"  {label:<24} {elapsed:5.2f}s  {describe(df)}")
+
+def circuit_breaker_scenario(refreshes=8):
+    """落ちたままのホストへの送信が、ブレーカーで止まることを確認"""
+    with salary_servers(hoopshype={'faults': {HOOPSHYPE_PATH: ['reset'] * 100}}) as (servers, urls):
+        scraper = NBAPlayerSalaryScraper(use_http_cache=False, source_urls=urls, retry_policy=make_retry_policy())
+        requests_per_refresh = []
+        for _ in range(refreshes):
+            before = len(servers['hoopshype'].request_log)
+            df, _ = run_quietly(scraper.get_all_salaries)
+            assert df is not None
+            requests_per_refresh.append(len(servers['hoopshype'].request_log) - before)
+
+    breaker = scraper.breakers.for_url(urls['hoopshype'])
+    print(f"primary down, {refreshes} refreshes: requests to primary per refresh {requests_per_refresh}, "
+          f"breaker {breaker.state}")
+    assert breaker.state == 'open' and requests_per_refresh[-1] == 0
+
+def table_fetch_scenario(page_count=30):
+    """テーブルの並行取得で、3件に1件が429（Retry-After付き）または503を返す場合"""
+    paths = [f'/leagues/NBA_2025_{i}.html' for i in range(page_count)]
+    pages = {path: make_stats_page(rows=50, seed=i) for i, path in enumerate(paths)}
+    faults = {
+        path: [(429, {'Retry-After': '1'}) if i % 2 else 503]
+        for i, path in enumerate(paths) if i % 3 == 0
+    }
+
+    print(f"{page_count} table pages, {len(faults)} with one 429/503 first:")
+    for label, policy in [('single attempt', make_retry_policy(max_retries=0)), ('retry', make_retry_policy())]:
+        with FixtureServer(pages, latency=0.05, faults=faults) as server:
+            async def fetch_all():
+                with AsyncFetcher(requests_per_second=20, burst=4, max_concurrency=8, retry_policy=policy) as fetcher:
+                    return await fetcher.fetch_all([server.base_url + path for path in paths])
+
+            start = time.perf_counter()
+            responses = asyncio.run(fetch_all())
+            elapsed = time.perf_counter() - start
+        failed = sum(isinstance(response, Exception) for response in responses)
+        print(f"  {label:<24} {elapsed:5.2f}s  {page_count - failed}/{page_count} pages")
+
+def main():
+    compare_salary_scenario(
+        'primary returns 503, then 429 (Retry-After: 1), backup is slow (3s)',
+        hoopshype={'faults': {HOOPSHYPE_PATH: [503, (429, {'Retry-After': '1'})]}},
+        bref={'latency': 3.0}
+    )
+    compare_salary_scenario(
+        'primary drops connections, backup is healthy',
+        hoopshype={'faults': {HOOPSHYPE_PATH: ['reset'] * 10}},
+        bref={'latency': 0.2}
+    )
+    compare_salary_scenario(
+        'every source fails, one hangs (10s), timeout 3s',
+        timeout=3,
+        hoopshype={'faults': {HOOPSHYPE_PATH: ['reset'] * 100}},
+        bref={'faults': {BREF_PATH: [503] * 100}},
+        espn={'latency': 10.0}
+    )
+    circuit_breaker_scenario()
+    table_fetch_scenario()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+サラリーページ解析の比較（行ごとの BeautifulSoup + 正規表現と、列単位の抽出・一括数値化）
+
+保存済みのHTML（引数で指定）または生成したフィクスチャを一時ディレクトリに保存し、
+1ページの解析時間と、複数ページ（シーズン・チーム別）をプロセスプールで解析した場合の
+時間を計測する。旧方式と抽出結果が一致することも確認する。
+
+実行方法:
+    python benchmarks/bench_salary_parsing.py
+    python benchmarks/bench_salary_parsing.py saved_page1.html saved_page2.html
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+import timeit
+import pandas as pd
+from bs4 import BeautifulSoup
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scraper'))
+
+from salary_extractor import parse_hoopshype_salaries, parse_hoopshype_pages
+from fixture_server import make_salary_page
+
+PAGE_COUNT = 24
+
+def legacy_clean_salary_text(salary_text):
+    """旧実装（1セルごとに正規表現）"""
+    if not salary_text or salary_text in ['-', '--', 'N/A', '']:
+        return 0
+    cleaned = re.sub(r'[^\d]', '', salary_text)
+    try:
+        return int(cleaned) if cleaned else 0
+    except ValueError:
+        return 0
+
+def legacy_parse_hoopshype(html):
+    """旧実装（行ごとに find_all・get_text・辞書を作成）"""
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = soup.select('.hh-salaries-ranking-table tbody tr')
+    if not rows:
+        rows = soup.select('table tbody tr')
+
+    players = []
+    for i, row in enumerate(rows):
+        cells = row.find_all('td')
+        if len(cells) < 3:
+            continue
+        name_element = cells[0].find('a') or cells[0]
+        name = name_element.get_text(strip=True)
+        if not name or name.lower() in ['player', 'name']:
+            continue
+        player_data = {
+            'player_name': name,
+            'team': cells[1].get_text(strip=True),
+            'current_salary': legacy_clean_salary_text(cells[2].get_text(strip=True)),
+            'rank': i + 1,
+            'source': 'hoopshype'
+        }
+        for j, cell in enumerate(cells[3:8]):
+            salary_value = legacy_clean_salary_text(cell.get_text(strip=True))
+            if salary_value > 0:
+                player_data[f'salary_year_{j+2}'] = salary_value
+        players.append(player_data)
+    return pd.DataFrame(players) if players else None
+
+def store_fixture_pages(directory):
+    """フィクスチャを保存し、そのパスを返す"""
+    paths = []
+    for i in range(PAGE_COUNT):
+        path = os.path.join(directory, f'salaries_{i}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(make_salary_page(rows=600, seed=i, filler_blocks=30))
+        paths.append(path)
+    return paths
+
+def read_pages(paths):
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = sys.argv[1:] or store_fixture_pages(directory)
+        pages = read_pages(paths)
+
+    html = pages[0]
+    legacy_df = legacy_parse_hoopshype(html)
+    fast_df, _ = parse_hoopshype_salaries(html)
+    if legacy_df is not None:
+        pd.testing.assert_frame_equal(legacy_df, fast_df[legacy_df.columns], check_dtype=False)
+
+    number = 3
+    legacy = timeit.timeit(lambda: legacy_parse_hoopshype(html), number=number) / number
+    fast = timeit.timeit(lambda: parse_hoopshype_salaries(html), number=number) / number
+    print(f"1 page ({len(html) // 1024} KB, {len(fast_df)} players): "
+          f"bs4 rows {legacy * 1000:.0f} ms, columnar {fast * 1000:.0f} ms, x{legacy / fast:.1f}")
+
+    if len(pages) < 2:
+        return
+
+    start = time.perf_counter()
+    sequential = parse_hoopshype_pages(pages)
+    sequential_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pooled = parse_hoopshype_pages(pages, use_process_pool=True)
+    pooled_elapsed = time.perf_counter() - start
+
+    assert all(a.equals(b) for a, b in zip(sequential, pooled))
+    print(f"{len(pages)} pages: sequential {sequential_elapsed:.2f}s, "
+          f"process pool ({os.cpu_count()} CPUs) {pooled_elapsed:.2f}s")
+
+if __name__ == '__main__':
+    main()
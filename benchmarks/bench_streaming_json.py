@@ -0,0 +1,86 @@
+"""
+JSON（辞書のリスト経由）と改行区切りJSON（チャンク単位）の書き込み・読み込みの比較
+
+複数シーズン分のサラリー履歴程度の行数で、書き込み・読み込みの時間とピークメモリ
+（tracemalloc）を計測する。読み込んだDataFrameが両形式で一致することも確認する。
+
+実行方法:
+    python benchmarks/bench_streaming_json.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scraper'))
+
+from config import NBA_TEAMS
+from records_io import write_records
+from data.loader import load_json_file
+
+ROW_COUNTS = [20_000, 200_000]
+
+def make_salary_history(rows, seed=42):
+    """選手・チーム・シーズン別の契約レコード"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'player_name': [f'Player {i}' for i in rng.integers(0, rows // 4, rows)],
+        'team': rng.choice(list(NBA_TEAMS.keys()), rows),
+        'season': rng.integers(2000, 2026, rows),
+        'current_salary': rng.integers(1_000_000, 55_000_000, rows),
+        'salary_year_2': np.where(rng.random(rows) < 0.5, rng.uniform(1e6, 5e7, rows).round(0), np.nan),
+        # ごく一部の選手だけが持つカラム（チャンクによっては全て欠損）
+        'salary_year_6': np.where(rng.random(rows) < 0.0005, rng.uniform(1e6, 5e7, rows).round(0), np.nan),
+        'rank': np.arange(1, rows + 1),
+        'source': 'hoopshype'
+    })
+
+def measure(func):
+    """(結果, 秒数, ピークメモリMB)"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    # tracemalloc 下では処理が遅くなるため、ピークメモリは別に計測
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+def write_json_records(df, path):
+    """従来の書き込み（辞書のリストを作ってから json.dump）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(df.to_dict('records'), f, indent=2, ensure_ascii=False)
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        # 同名だと改行区切りJSONの保存時に .json 側が削除されるため、別名で比較する
+        json_path = os.path.join(directory, 'salaries_json.json')
+        ndjson_path = os.path.join(directory, 'salaries_ndjson.ndjson')
+
+        for rows in ROW_COUNTS:
+            df = make_salary_history(rows)
+
+            _, json_write, json_write_peak = measure(lambda: write_json_records(df, json_path))
+            _, ndjson_write, ndjson_write_peak = measure(lambda: write_records(df, ndjson_path))
+
+            json_df, json_read, json_read_peak = measure(lambda: load_json_file(json_path))
+            ndjson_df, ndjson_read, ndjson_read_peak = measure(lambda: load_json_file(ndjson_path))
+            pd.testing.assert_frame_equal(json_df, ndjson_df)
+
+            print(f"{rows} rows:")
+            print(f"  write  json {json_write:.2f}s / {json_write_peak:.0f} MB peak, "
+                  f"ndjson {ndjson_write:.2f}s / {ndjson_write_peak:.0f} MB peak")
+            print(f"  read   json {json_read:.2f}s / {json_read_peak:.0f} MB peak, "
+                  f"ndjson {ndjson_read:.2f}s / {ndjson_read_peak:.0f} MB peak "
+                  f"(DataFrame {ndjson_df.memory_usage(deep=True).sum() / 1024 / 1024:.0f} MB)")
+
+if __name__ == '__main__':
+    main()
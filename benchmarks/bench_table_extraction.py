@@ -0,0 +1,58 @@
+"""
+Basketball-Reference テーブル抽出の比較（BeautifulSoup + read_html と lxml 1パス抽出）
+
+保存済みのページ（引数でHTMLファイルを指定）または生成したフィクスチャページに対して
+両方式の抽出時間を計測し、抽出結果の値が一致することを確認する。
+
+実行方法:
+    python benchmarks/bench_table_extraction.py
+    python benchmarks/bench_table_extraction.py saved_page1.html saved_page2.html
+"""
+import os
+import sys
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scraper'))
+
+from nba_data_scraping import parse_table_with_beautifulsoup
+from table_extractor import extract_stats_table
+from fixture_server import make_stats_page
+
+def fixture_pages():
+    """行数・ページサイズの異なるフィクスチャ"""
+    return {
+        'per_game 700 rows': make_stats_page(rows=700, filler_blocks=50).encode('utf-8'),
+        'per_game 700 rows (commented)': make_stats_page(rows=700, filler_blocks=50, commented=True).encode('utf-8'),
+        'multi-season 5000 rows': make_stats_page(rows=5000, filler_blocks=50).encode('utf-8')
+    }
+
+def load_saved_pages(paths):
+    pages = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+def main():
+    pages = load_saved_pages(sys.argv[1:]) if len(sys.argv) > 1 else fixture_pages()
+
+    for name, html in pages.items():
+        legacy_df = parse_table_with_beautifulsoup(html)
+        fast_df = extract_stats_table(html)
+
+        if legacy_df is not None and fast_df is not None:
+            assert legacy_df.shape == fast_df.shape
+            assert (legacy_df.astype(str).values == fast_df.astype(str).values).all()
+
+        number = 3
+        fast = timeit.timeit(lambda: extract_stats_table(html), number=number) / number
+        legacy = timeit.timeit(lambda: parse_table_with_beautifulsoup(html), number=number) / number
+
+        found = 'not found' if legacy_df is None else f'{len(legacy_df)} rows'
+        print(f"{name} ({len(html) // 1024} KB): "
+              f"bs4+read_html {legacy * 1000:.0f} ms ({found}), lxml {fast * 1000:.0f} ms ({len(fast_df)} rows), "
+              f"x{legacy / fast:.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+スクレイパー検証用のローカルHTTPフィクスチャサーバー
+
+パス → HTMLの辞書を渡すと、指定した遅延付きでそのHTMLを返す。
+ETag / Last-Modified を付与し、条件付きリクエストには 304 を返す。
+faults を渡すと、パスごとに最初の数件を 429 / 503 や接続断に差し替えられる。
+スクレイパーの base_url に server.base_url を渡して実サイトの代わりに使う。
+"""
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+def make_stats_page(rows=700, seed=42, table_id='per_game_stats', commented=False, filler_blocks=0):
+    """Basketball-Reference形式の統計テーブルを含むHTMLを生成"""
+    rng = np.random.default_rng(seed)
+    columns = ['Rk', 'Player', 'Age', 'Team', 'Pos', 'G', 'GS', 'MP', 'PTS', 'TRB', 'AST']
+    header = ''.join(f'<th>{col}</th>' for col in columns)
+
+    body = []
+    for i in range(rows):
+        # 20行ごとにヘッダー行が繰り返される
+        if i and i % 20 == 0:
+            body.append(f'<tr class="thead">{header}</tr>')
+        cells = [
+            i + 1, f'Player {i}', int(rng.integers(19, 40)), 'LAL', 'SF',
+            int(rng.integers(1, 83)), int(rng.integers(0, 83)),
+            f'{rng.uniform(5, 38):.1f}', f'{rng.uniform(0, 35):.1f}',
+            f'{rng.uniform(0, 15):.1f}', f'{rng.uniform(0, 12):.1f}'
+        ]
+        body.append('<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>')
+
+    table = (
+        f'<table id="{table_id}" class="stats_table"><thead><tr>{header}</tr></thead>'
+        f'<tbody>{"".join(body)}</tbody></table>'
+    )
+    # 遅延描画されるテーブルはコメントアウトされた状態で配信される
+    if commented:
+        table = f'<div id="all_{table_id}"><!--\n{table}\n--></div>'
+
+    # 実ページのナビゲーション等に相当する無関係なマークアップ
+    filler = ''.join(
+        f'<div class="nav"><ul>{"".join(f"<li><a href=/p{i}_{j}>Link {j}</a></li>" for j in range(20))}</ul></div>'
+        for i in range(filler_blocks)
+    )
+
+    return f'<html><head><title>Stats</title></head><body>{filler}{table}{filler}</body></html>'
+
+def make_salary_page(rows=600, seed=42, filler_blocks=0):
+    """HoopsHype形式のサラリーテーブルを含むHTMLを生成"""
+    rng = np.random.default_rng(seed)
+    teams = ['LAL', 'BOS', 'GSW', 'DEN', 'PHX', 'MIL', 'NYK', 'MIA']
+    years = ['2024/25', '2025/26', '2026/27', '2027/28', '2028/29', '2029/30']
+    header = '<th>Player</th><th>Team</th>' + ''.join(f'<th>{year}</th>' for year in years)
+
+    body = []
+    for i in range(rows):
+        salaries = []
+        remaining = int(rng.integers(1, len(years) + 1))
+        for year in range(len(years)):
+            if year < remaining:
+                salaries.append(f'${int(rng.integers(1_100_000, 55_000_000)):,}')
+            else:
+                # 契約が終わった年は '-' または空欄
+                salaries.append('-' if rng.random() < 0.5 else '')
+        name = f'Player Dončić {i}' if i % 50 == 0 else f'Player {i}'
+        cells = [f'<a href="/player/{i}/">{name}</a>', teams[i % len(teams)]] + salaries
+        body.append('<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>')
+        # 広告等の列数が足りない行
+        if i % 100 == 99:
+            body.append('<tr><td colspan="8">Advertisement</td></tr>')
+
+    filler = ''.join(
+        f'<div class="nav"><ul>{"".join(f"<li><a href=/p{i}_{j}>Link {j}</a></li>" for j in range(20))}</ul></div>'
+        for i in range(filler_blocks)
+    )
+    table = (
+        f'<table class="hh-salaries-ranking-table"><thead><tr>{header}</tr></thead>'
+        f'<tbody>{"".join(body)}</tbody></table>'
+    )
+    return (
+        '<html><head><meta charset="utf-8"><title>Salaries</title></head>'
+        f'<body>{filler}{table}{filler}</body></html>'
+    )
+
+def make_contracts_page(rows=600, seed=42):
+    """Basketball-Reference形式の契約テーブル（contracts/players.html）を含むHTMLを生成"""
+    rng = np.random.default_rng(seed)
+    header = '<th>Rk</th><th>Player</th><th>Tm</th><th>Salary 2025-26</th><th>2026-27</th>'
+    body = ''.join(
+        f'<tr><td>{i + 1}</td><td>Player {i}</td><td>LAL</td>'
+        f'<td>${int(rng.integers(1_100_000, 55_000_000)):,}</td><td>${int(rng.integers(1_100_000, 55_000_000)):,}</td></tr>'
+        for i in range(rows)
+    )
+    return (
+        '<html><head><title>Contracts</title></head><body>'
+        f'<table id="player-contracts"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>'
+        '</body></html>'
+    )
+
+
+class FixtureServer:
+    """固定レスポンスを返すスレッド型HTTPサーバー（with文で起動・停止）"""
+
+    def __init__(self, pages, latency=0.0, faults=None):
+        # pages: パス → HTML文字列
+        self.pages = pages
+        self.latency = latency
+        # faults: パス → 先頭から順に返す障害のリスト（使い切った後は通常の応答）
+        #   ステータスコード、(ステータスコード, ヘッダーの辞書)、'reset'（応答せずに切断）
+        self.faults = {path: list(entries) for path, entries in (faults or {}).items()}
+        self._faults_lock = threading.Lock()
+        self.request_log = []
+        self.last_modified = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime())
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def next_fault(self, path):
+        """このリクエストに適用する障害（なければNone）"""
+        with self._faults_lock:
+            entries = self.faults.get(path)
+            return entries.pop(0) if entries else None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.request_log.append((time.monotonic(), self.path))
+                time.sleep(server.latency)
+
+                fault = server.next_fault(self.path)
+                if fault == 'reset':
+                    # 何も返さずに切断（クライアント側は ConnectionError）
+                    self.close_connection = True
+                    return
+                if fault is not None:
+                    status, headers = fault if isinstance(fault, tuple) else (fault, {})
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                page = server.pages.get(self.path)
+                if page is None:
+                    self.send_error(404)
+                    return
+
+                body = page.encode('utf-8')
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', server.last_modified)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -17,6 +17,13 @@ except ImportError as e:
     st.warning(f"JSONインポートエラー: {e}")
     JSON_AVAILABLE = False
 
+# カラムナーキャッシュ用（任意：なければJSONのみで動作）
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 def setup_page_config():
     """Streamlitページ設定"""
     st.set_page_config(
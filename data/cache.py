@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from config import PYARROW_AVAILABLE
+
+# キャッシュはデータディレクトリ配下に作成（JSONが常に正本）
+CACHE_DIR_NAME = '.cache'
+
+# 読み込み後の加工処理（型変換・フィルタ）を変更したら上げる
+CACHE_VERSION = 2
+
+def get_cache_paths(filepath):
+    """ソースファイルに対応するParquetとメタデータのパスを取得"""
+    data_dir, filename = os.path.split(filepath)
+    base_name = os.path.splitext(filename)[0]
+    cache_dir = os.path.join(data_dir, CACHE_DIR_NAME)
+    return (
+        os.path.join(cache_dir, f"{base_name}.parquet"),
+        os.path.join(cache_dir, f"{base_name}.meta.json")
+    )
+
+def compute_file_hash(filepath, chunk_size=1024 * 1024):
+    """ファイル内容のSHA-256を計算"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def compute_frame_hash(df):
+    """DataFrameの内容（カラム・型・値）からハッシュを計算"""
+    digest = hashlib.sha256()
+    digest.update(repr(list(df.columns)).encode('utf-8'))
+    digest.update(repr([str(dtype) for dtype in df.dtypes]).encode('utf-8'))
+    if len(df) > 0:
+        digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+def read_cache_meta(filepath):
+    """キャッシュのメタデータを読み込み（なければNone）"""
+    _, meta_path = get_cache_paths(filepath)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_json_atomic(path, payload):
+    """一時ファイル経由でJSONを書き込み"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+def is_cache_fresh(filepath, meta):
+    """キャッシュがソースファイルと一致しているか判定"""
+    if not meta or meta.get('cache_version') != CACHE_VERSION:
+        return False
+
+    stat = os.stat(filepath)
+    if meta.get('source_size') != stat.st_size:
+        return False
+    if meta.get('source_mtime_ns') == stat.st_mtime_ns:
+        return True
+
+    # mtimeだけ変わった場合（再デプロイ・git checkout等）は内容ハッシュで確認
+    if compute_file_hash(filepath) != meta.get('source_sha256'):
+        return False
+
+    meta['source_mtime_ns'] = stat.st_mtime_ns
+    try:
+        _write_json_atomic(get_cache_paths(filepath)[1], meta)
+    except OSError:
+        pass
+    return True
+
+def load_cached_frame(filepath):
+    """有効なキャッシュがあればDataFrameを返す（なければNone）"""
+    if not PYARROW_AVAILABLE:
+        return None
+
+    try:
+        meta = read_cache_meta(filepath)
+        if not is_cache_fresh(filepath, meta):
+            return None
+        parquet_path, _ = get_cache_paths(filepath)
+        return pd.read_parquet(parquet_path)
+    except Exception:
+        # 壊れたキャッシュはJSONから作り直す
+        return None
+
+def write_cached_frame(filepath, df):
+    """加工済みDataFrameをParquetキャッシュとして保存（失敗は無視）"""
+    if not PYARROW_AVAILABLE:
+        return False
+
+    parquet_path, meta_path = get_cache_paths(filepath)
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+        stat = os.stat(filepath)
+
+        # メタデータを完了の印とするため、書き換え中は先に無効化する
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, parquet_path)
+
+        _write_json_atomic(meta_path, {
+            'cache_version': CACHE_VERSION,
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'source_sha256': compute_file_hash(filepath),
+            'rows': len(df),
+            'columns': len(df.columns)
+        })
+        return True
+    except Exception:
+        # 型が混在したカラム等で書けない場合はキャッシュなしで続行
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return False
@@ -0,0 +1,125 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from .seasons import align_categories
+
+# スクレイパーが保存先JSONの隣に追記する変更履歴（scraper/changelog.py と同じ規約）
+CHANGELOG_SUFFIX = '.changelog.jsonl'
+
+def get_changelog_path(filepath):
+    """データファイルに対応する変更履歴のパス"""
+    return os.path.splitext(filepath)[0] + CHANGELOG_SUFFIX
+
+def read_changelog(filepath):
+    """変更履歴を読み込み（なければ空リスト、壊れた行は無視）"""
+    entries = []
+    try:
+        with open(get_changelog_path(filepath), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        return []
+    return entries
+
+def find_change_chain(entries, from_version, to_version):
+    """from_version から to_version までを順につなぐ変更履歴（つながらなければNone）"""
+    by_base = {tuple(entry['from']): entry for entry in entries if 'from' in entry and 'to' in entry}
+
+    chain = []
+    version = tuple(from_version)
+    while version != tuple(to_version):
+        entry = by_base.get(version)
+        if entry is None or len(chain) >= len(by_base):
+            return None
+        chain.append(entry)
+        version = tuple(entry['to'])
+    return chain
+
+def _key_index(df, key_columns):
+    return pd.MultiIndex.from_arrays([df[col].astype(object).to_numpy() for col in key_columns])
+
+def _positions_by_key(keys, mask):
+    """mask 対象の行について、キー → (最初の位置, 最後の位置)"""
+    positions = {}
+    for position in np.flatnonzero(mask):
+        first, _ = positions.get(keys[position], (position, position))
+        positions[keys[position]] = (first, position)
+    return positions
+
+def _upsert_sort_keys(upsert_keys, anchors, base_positions):
+    """追加行の並び順（既存キーは元の位置、新しいキーは直前の行の後ろ）
+
+    直前の行が保持中のデータにも追加行にもない場合（読み込み時に除外される複数チーム行等）は
+    位置を決められないためNone。
+    """
+    sort_keys = []
+    assigned = {}
+    for i, (key, anchor) in enumerate(zip(upsert_keys, anchors)):
+        if key in base_positions:
+            sort_key = (base_positions[key][0], 0)
+        elif anchor is None:
+            sort_key = (-1, i + 1)
+        elif anchor in assigned:
+            sort_key = (assigned[anchor][0], assigned[anchor][1] + 1)
+        elif anchor in base_positions:
+            sort_key = (base_positions[anchor][1], 1)
+        else:
+            return None
+        assigned[key] = sort_key
+        sort_keys.append(sort_key)
+    return sort_keys
+
+def apply_row_changes(df, entries, prepare_rows):
+    """
+    変更履歴を順に適用したDataFrameを作成（キーが変わった行を置き換え、消えたキーの行を削除）
+
+    prepare_rows(rows_df) で追加行を読み込み時と同じ型・フィルタに揃える。
+    行の並びは変更後のファイルを全件読み込んだ場合と同じになる。
+    適用できない履歴（キーのカラムがない・新しい行の位置を決められない等）があればNone。
+    """
+    for entry in entries:
+        key_columns = entry.get('key') or []
+        rows = entry.get('upserts') or []
+        if not key_columns or any(col not in df.columns for col in key_columns):
+            return None
+        if any(col not in row for row in rows for col in key_columns):
+            return None
+
+        upsert_keys = [tuple(row[col] for col in key_columns) for row in rows]
+        anchors = [tuple(anchor) if anchor is not None else None for anchor in entry.get('after') or [None] * len(rows)]
+        changed_keys = set(upsert_keys) | {tuple(key) for key in entry.get('deletes') or []}
+
+        base_keys = _key_index(df, key_columns)
+        replaced = base_keys.isin(list(changed_keys))
+        anchor_keys = {anchor for anchor in anchors if anchor is not None}
+        base_positions = _positions_by_key(base_keys, replaced | base_keys.isin(list(anchor_keys)))
+        sort_keys = _upsert_sort_keys(upsert_keys, anchors, base_positions)
+        if sort_keys is None:
+            return None
+
+        # 追加行は読み込み時と同じ加工をし（複数チーム行の除外で減る場合あり）、残った行の並び順を使う
+        if rows:
+            upserts = prepare_rows(pd.DataFrame(rows)).reindex(columns=df.columns)
+            upsert_sort_keys = [sort_keys[i] for i in upserts.index]
+        else:
+            upserts = df.iloc[:0]
+            upsert_sort_keys = []
+
+        kept_positions = np.flatnonzero(~replaced)
+        combined = pd.concat(align_categories([df.take(kept_positions), upserts]), ignore_index=True)
+        major = np.concatenate([kept_positions, [key[0] for key in upsert_sort_keys]]).astype(np.int64)
+        minor = np.concatenate([np.zeros(len(kept_positions)), [key[1] for key in upsert_sort_keys]])
+        df = combined.take(np.lexsort((minor, major))).reset_index(drop=True)
+
+    return df
+
+def count_row_changes(entries):
+    """変更履歴に含まれる置き換え行数と削除キー数"""
+    return {
+        'upserts': sum(len(entry.get('upserts') or []) for entry in entries),
+        'deletes': sum(len(entry.get('deletes') or []) for entry in entries)
+    }
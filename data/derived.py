@@ -0,0 +1,302 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from .cache import compute_frame_hash
+from .store import get_shared_store
+from utils.helpers import (
+    filter_multi_team_records, select_latest_team_records, normalize_player_names, calculate_efficiency_matrix
+)
+
+# チーム集計の対象とする出場条件（どちらかを満たせばアクティブ）
+ACTIVE_MIN_MINUTES = 10.0
+ACTIVE_MIN_GAMES = 10
+
+# チーム集計の対象スタッツ
+TEAM_STAT_COLUMNS = ['PTS', 'TRB', 'AST', 'STL', 'BLK', 'TOV']
+
+# NBAレギュラーシーズンの試合数
+NBA_REGULAR_SEASON_GAMES = 82
+
+# サラリー効率（統計値 / 100万ドル）を計算する指標
+EFFICIENCY_METRICS = ['PER', 'VORP', 'WS', 'BPM', 'TS%', 'USG%']
+
+def build_current_team_players(per_game_df):
+    """TOTを除外し、各選手の最新チーム（最大試合数）のレコードのみを保持"""
+    if per_game_df.empty or not {'Player', 'Team'}.issubset(per_game_df.columns):
+        return pd.DataFrame()
+
+    clean_df = per_game_df.dropna(subset=['Player', 'Team'])
+    non_tot_df = clean_df[clean_df['Team'] != 'TOT']
+
+    if 'G' in non_tot_df.columns:
+        return non_tot_df.loc[non_tot_df.groupby('Player')['G'].idxmax()]
+    return non_tot_df.drop_duplicates(subset=['Player'], keep='last')
+
+def _active_mask(players, min_minutes, min_games):
+    """出場条件（平均出場時間 または 試合数）を満たす選手のマスク"""
+    if 'MP' in players.columns and 'G' in players.columns:
+        return (
+            (players['MP'].fillna(0).to_numpy() >= min_minutes) |
+            (players['G'].fillna(0).to_numpy() >= min_games)
+        )
+    return np.ones(len(players), dtype=bool)
+
+def build_active_players(current_team_players, min_minutes=ACTIVE_MIN_MINUTES, min_games=ACTIVE_MIN_GAMES):
+    """実際に出場している選手のみを抽出"""
+    mask = _active_mask(current_team_players, min_minutes, min_games)
+    return current_team_players if mask.all() else current_team_players[mask]
+
+def build_team_stats(current_team_players, min_minutes=ACTIVE_MIN_MINUTES, min_games=ACTIVE_MIN_GAMES):
+    """アクティブ選手の総統計値（1試合平均 × 試合数）をチーム単位で集計"""
+    available_stats = [stat for stat in TEAM_STAT_COLUMNS if stat in current_team_players.columns]
+    if current_team_players.empty or 'G' not in current_team_players.columns or not available_stats:
+        return pd.DataFrame()
+
+    # 行の抽出は行わず、カラム配列にマスクを適用して集計
+    active = _active_mask(current_team_players, min_minutes, min_games)
+    codes, teams = pd.factorize(current_team_players['Team'][active], sort=True)
+    valid = codes >= 0
+    if not valid.any():
+        return pd.DataFrame()
+
+    codes = codes[valid]
+    games = current_team_players['G'].to_numpy(dtype='float64')[active][valid]
+    stats = current_team_players[available_stats].to_numpy(dtype='float64')[active][valid]
+
+    # 全スタッツの総統計値を2次元配列でまとめて計算し、チームコードごとに合計（欠損は0扱い）
+    player_totals = stats * games[:, None]
+    player_totals[np.isnan(player_totals)] = 0.0
+    totals = np.column_stack([
+        np.bincount(codes, weights=player_totals[:, i], minlength=len(teams))
+        for i in range(len(available_stats))
+    ])
+
+    # チーム内の最大試合数（シーズン全体の試合数に近い、欠損は無視）
+    max_games = np.full(len(teams), np.nan)
+    np.fmax.at(max_games, codes, games)
+    max_games[np.isnan(max_games)] = 0.0
+
+    total_dtype = np.result_type(*current_team_players[available_stats].dtypes, current_team_players['G'].dtype)
+    columns = {'Team': teams, 'G': max_games.astype(current_team_players['G'].dtype)}
+    for i, stat in enumerate(available_stats):
+        columns[f'{stat}_total'] = totals[:, i].astype(total_dtype)
+    # チームの1試合平均（総統計値 ÷ 82試合）
+    for i, stat in enumerate(available_stats):
+        columns[f'{stat}_per_game'] = totals[:, i] / NBA_REGULAR_SEASON_GAMES
+
+    return pd.DataFrame(columns)
+
+def build_advanced_players(advanced_df):
+    """advanced から選手レコードのみを抽出"""
+    if 'Player' not in advanced_df.columns:
+        return pd.DataFrame()
+    return advanced_df[advanced_df['Player'].notna()]
+
+def build_advanced_teams(advanced_df):
+    """advanced からチームレコードのみを抽出"""
+    if 'Team' not in advanced_df.columns:
+        return pd.DataFrame()
+    if 'Player' in advanced_df.columns:
+        return advanced_df[advanced_df['Player'].isna() & advanced_df['Team'].notna()]
+    return advanced_df[advanced_df['Team'].notna()]
+
+def identify_player_column(salary_df):
+    """プレイヤー名カラムを特定"""
+    possible_names = ['player_name', 'Player', 'name', 'player', 'NAME', 'full_name']
+
+    for col in possible_names:
+        if col in salary_df.columns:
+            sample_values = salary_df[col].dropna().head()
+            if len(sample_values) > 0:
+                try:
+                    pd.to_numeric(sample_values.iloc[0])
+                    continue
+                except:
+                    return col
+
+    for col in salary_df.columns:
+        try:
+            pd.to_numeric(salary_df[col].dropna().iloc[0])
+        except:
+            return col
+
+    return None
+
+def identify_salary_column(salary_df):
+    """サラリーカラムを特定"""
+    possible_names = ['current_salary', 'salary', 'total_salary', '2024-25', '2025', 'amount']
+
+    for col in possible_names:
+        if col in salary_df.columns:
+            return col
+
+    numeric_cols = salary_df.select_dtypes(include=[np.number]).columns
+    if len(numeric_cols) > 0:
+        max_avg = 0
+        best_col = None
+        for col in numeric_cols:
+            avg_val = salary_df[col].mean()
+            if avg_val > max_avg:
+                max_avg = avg_val
+                best_col = col
+        return best_col
+
+    return None
+
+def build_player_identity(*player_frames):
+    """選手スタッツの全プレイヤー名から 正規化名 → 選手ID の対応表を作成"""
+    names = [df['Player'] for df in player_frames if 'Player' in df.columns]
+    if not names:
+        return pd.DataFrame(columns=['name_key', 'Player', 'player_id'])
+
+    names = pd.concat(names, ignore_index=True)
+    identity = pd.DataFrame({'name_key': normalize_player_names(names), 'Player': names.to_numpy()})
+    # 最初に現れた表記を代表名とする
+    identity = identity[identity['name_key'] != ''].drop_duplicates(subset=['name_key']).reset_index(drop=True)
+    identity['player_id'] = np.arange(len(identity), dtype='int32')
+    return identity
+
+def lookup_player_ids(names, identity):
+    """プレイヤー名を選手IDに変換（該当なしは-1）"""
+    if identity.empty:
+        return np.full(len(names), -1, dtype='int32')
+
+    positions = pd.Index(identity['name_key']).get_indexer(normalize_player_names(names))
+    ids = identity['player_id'].to_numpy()
+    return np.where(positions >= 0, ids[positions], -1).astype('int32')
+
+def build_salary_player_ids(salary_df, identity):
+    """サラリーデータの名前・金額カラムを特定し、選手IDを付与"""
+    if salary_df.empty:
+        return pd.DataFrame()
+
+    salary_player_col = identify_player_column(salary_df)
+    salary_col = identify_salary_column(salary_df)
+    if not salary_player_col or not salary_col:
+        return pd.DataFrame()
+
+    salary_names = salary_df[salary_player_col].astype(str).str.strip()
+    return pd.DataFrame({
+        salary_player_col: salary_names,
+        salary_col: pd.to_numeric(salary_df[salary_col], errors='coerce'),
+        'player_id': lookup_player_ids(salary_names, identity)
+    })
+
+def build_salary_players(advanced_players, salary_ids, identity):
+    """選手スタッツと実サラリーを選手IDで結合（結合できなければ空）"""
+    if advanced_players.empty or salary_ids.empty or 'Player' not in advanced_players.columns:
+        return pd.DataFrame()
+
+    salary_player_col, salary_col = salary_ids.columns[:2]
+    salary_values = salary_ids[salary_col]
+    # 有効なサラリーのみ、同一選手は先頭のレコードを採用
+    matched = salary_ids[(salary_ids['player_id'] >= 0) & salary_values.notna() & (salary_values > 0)]
+    matched = matched.drop_duplicates(subset=['player_id'])
+    if matched.empty:
+        return pd.DataFrame()
+
+    # 整数キーのハッシュ参照で結合
+    player_ids = lookup_player_ids(advanced_players['Player'], identity)
+    positions = pd.Index(matched['player_id']).get_indexer(player_ids)
+    found = positions >= 0
+    salary_rows = matched.iloc[positions[found]]
+
+    merged_df = advanced_players[found].reset_index(drop=True)
+    merged_df['player_id'] = player_ids[found]
+    if salary_player_col not in merged_df.columns:
+        merged_df[salary_player_col] = salary_rows[salary_player_col].to_numpy()
+    merged_df[salary_col] = salary_rows[salary_col].to_numpy()
+    merged_df['Salary'] = merged_df[salary_col]
+    return merged_df
+
+def build_salary_efficiency(salary_players):
+    """全効率指標の <指標>_per_million カラムをまとめて計算して付与"""
+    if salary_players.empty or 'Salary' not in salary_players.columns:
+        return salary_players
+
+    metric_values = {
+        metric: pd.to_numeric(salary_players[metric], errors='coerce')
+        for metric in EFFICIENCY_METRICS if metric in salary_players.columns
+    }
+    # 全て欠損、または合計が0の指標は対象外
+    metrics = [metric for metric, values in metric_values.items() if not values.isna().all() and values.sum() != 0]
+    if not metrics:
+        return salary_players
+
+    # 選手 × 指標の行列としてサラリーで一括除算（サラリーが欠損・0以下の行はNaN）
+    efficiency = calculate_efficiency_matrix(salary_players, metrics, 'Salary')
+
+    efficiency_df = pd.DataFrame(
+        efficiency,
+        index=salary_players.index,
+        columns=[f'{metric}_per_million' for metric in metrics]
+    )
+    return pd.concat([salary_players.drop(columns=efficiency_df.columns, errors='ignore'), efficiency_df], axis=1)
+
+# 派生テーブル名 → (入力テーブル名, 生成関数)
+# 入力にはデータセット名または他の派生テーブル名を指定できる
+DERIVED_TABLES = {
+    'latest_team_players': (('filtered_per_game',), select_latest_team_records),
+    'current_team_players': (('filtered_per_game',), build_current_team_players),
+    'active_players': (('current_team_players',), build_active_players),
+    'team_stats': (('current_team_players',), build_team_stats),
+    'advanced_players': (('filtered_advanced',), build_advanced_players),
+    'advanced_teams': (('filtered_advanced',), build_advanced_teams),
+    'player_identity': (('filtered_per_game', 'filtered_advanced'), build_player_identity),
+    'salary_player_ids': (('player_salaries', 'player_identity'), build_salary_player_ids),
+    'salary_players': (('advanced_players', 'salary_player_ids', 'player_identity'), build_salary_players),
+    'salary_efficiency': (('salary_players',), build_salary_efficiency)
+}
+
+# 2TM、3TM等の複数チーム移籍レコードを除外した各データセット
+for _dataset in ['per_game', 'advanced', 'play_by_play', 'team_salaries', 'player_salaries']:
+    DERIVED_TABLES[f'filtered_{_dataset}'] = ((_dataset,), filter_multi_team_records)
+
+def get_table_fingerprint(data, name, params=None):
+    """データセットまたは派生テーブルの内容ハッシュを取得（paramsは生成関数の引数）"""
+    if name in DERIVED_TABLES:
+        inputs, _ = DERIVED_TABLES[name]
+        parts = [name, repr(sorted((params or {}).items()))]
+        parts += [get_table_fingerprint(data, source) for source in inputs]
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+    df = data[name] if name in data else pd.DataFrame()
+    # 読み込み時に計算済みのハッシュがあれば再計算しない
+    return df.attrs.get('content_hash') or compute_frame_hash(df)
+
+def get_derived_table(data, name, **params):
+    """派生テーブルを取得（入力の内容ハッシュと引数が同じ間はプロセス内で共有）"""
+    inputs, build_func = DERIVED_TABLES[name]
+
+    def build():
+        frames = [
+            get_derived_table(data, source) if source in DERIVED_TABLES
+            else (data[source] if source in data else pd.DataFrame())
+            for source in inputs
+        ]
+        # 入力から引き継いだ内容ハッシュ等の属性は持ち越さない
+        result = build_func(*frames, **params).copy(deep=False)
+        result.attrs = {}
+        return result
+
+    # シーズン等の異なるデータを見ているセッション同士で上書きし合わないよう、入力の内容ハッシュをキーに含める
+    # （古い内容のテーブルは共有ストアのLRUで破棄される）
+    fingerprint = get_table_fingerprint(data, name, params)
+    key = ('derived', name, fingerprint) + tuple(sorted(params.items()))
+    return get_shared_store().get_view(key, fingerprint, build)
+
+def get_salary_match_coverage(data):
+    """サラリーデータの選手名照合率（照合できなかった名前を含む）"""
+    salary_ids = get_derived_table(data, 'salary_player_ids')
+    if salary_ids.empty:
+        return {'total': 0, 'matched': 0, 'rate': 0.0, 'unmatched': []}
+
+    name_col = salary_ids.columns[0]
+    matched = salary_ids['player_id'].to_numpy() >= 0
+    total = len(salary_ids)
+    return {
+        'total': total,
+        'matched': int(matched.sum()),
+        'rate': float(matched.mean()) if total else 0.0,
+        'unmatched': salary_ids.loc[~matched, name_col].tolist()
+    }
@@ -0,0 +1,109 @@
+import os
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from .cache import read_cache_meta, is_cache_fresh
+
+class LazyNBAData(Mapping):
+    """初回アクセス時にデータセットを読み込むdict互換コンテナ"""
+
+    def __init__(self, data_dir, file_mappings, load_func):
+        self.data_dir = data_dir
+        # 値がタプルの場合は複数ファイル（シーズン別パーティション）を結合して1データセットとする
+        self._paths = {
+            key: tuple(os.path.join(data_dir, name) for name in filename)
+            if isinstance(filename, tuple) else os.path.join(data_dir, filename)
+            for key, filename in file_mappings.items()
+        }
+        # load_func(filepath, dataset, changes=None) -> DataFrame
+        # （changes にdictを渡すと、共有ストアへ反映したファイル別の更新内容がそこに記録される）
+        self._load_func = load_func
+        self._frames = {}
+
+    def __getitem__(self, key):
+        if key not in self._paths:
+            raise KeyError(key)
+        if key not in self._frames:
+            self._frames[key] = self._load(key)
+        return self._frames[key]
+
+    def __contains__(self, key):
+        # Mapping標準の実装は読み込みを伴うため上書き
+        return key in self._paths
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def _load(self, key, changes=None):
+        """1データセットを読み込み（失敗時は空のDataFrame）"""
+        filepath = self._existing_path(key)
+        if filepath is None:
+            return pd.DataFrame()
+
+        try:
+            df = self._load_func(filepath, key, changes=changes)
+        except Exception:
+            return pd.DataFrame()
+
+        return df if not df.empty else pd.DataFrame()
+
+    def _existing_path(self, key):
+        """存在するソースファイル（複数なら存在するものだけのタプル、なければNone）"""
+        filepath = self._paths[key]
+        if not isinstance(filepath, tuple):
+            return filepath if os.path.exists(filepath) else None
+
+        existing = tuple(path for path in filepath if os.path.exists(path))
+        if not existing:
+            return None
+        return existing[0] if len(existing) == 1 else existing
+
+    def has_source(self, key):
+        """ソースファイルが存在するか"""
+        return key in self._paths and self._existing_path(key) is not None
+
+    def is_loaded(self, key):
+        """既に読み込み済みか"""
+        return key in self._frames
+
+    def preload(self, keys=None, changes=None):
+        """指定したデータセットをまとめて並列に読み込み"""
+        pending = [key for key in (keys or self._paths) if key in self._paths and key not in self._frames]
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            frames = dict(zip(pending, executor.map(lambda key: self._load(key, changes), pending)))
+        self._frames.update(frames)
+
+    def refresh(self):
+        """読み込み済みのデータセットを読み込み直し、ファイル別の更新内容を返す"""
+        # 読み込みは共有ストア経由のため、更新されていないファイルは再パースされない
+        loaded = list(self._frames)
+        self._frames.clear()
+        # 更新内容はこの呼び出しの中だけで集める（他のセッションの再読み込みと混ざらない）
+        changes = {}
+        self.preload(loaded, changes)
+        return changes
+
+    def record_count(self, key):
+        """レコード数を取得（未読み込みならキャッシュのメタデータを利用、メタデータもなければNone）"""
+        if key in self._frames:
+            return len(self._frames[key])
+        if not self.has_source(key):
+            return 0
+
+        filepath = self._existing_path(key)
+        filepaths = filepath if isinstance(filepath, tuple) else (filepath,)
+        try:
+            metas = [(path, read_cache_meta(path)) for path in filepaths]
+            if all(is_cache_fresh(path, meta) for path, meta in metas):
+                return sum(meta.get('rows', 0) for _, meta in metas)
+        except OSError:
+            pass
+
+        # 件数を知るためだけに読み込むと初回表示で全データセットを読むことになるため、件数不明とする
+        return None
@@ -1,67 +1,262 @@
 import streamlit as st
 import pandas as pd
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from config import JSON_AVAILABLE
 from .sample_data import create_sample_data
+from .cache import load_cached_frame, write_cached_frame, compute_frame_hash
+from .schema import apply_schema
+from .lazy import LazyNBAData
+from .store import get_shared_store, frame_nbytes
+from .changelog import read_changelog, find_change_chain, apply_row_changes, count_row_changes
+from .seasons import (
+    list_available_seasons, normalize_seasons, build_season_file_mappings,
+    get_partition_season, concat_season_frames
+)
 from utils.helpers import filter_multi_team_records
+# 改行区切りJSON（.ndjson/.jsonl）の拡張子と読み込みはスクレイパーの保存形式と共通（同名の .json より優先して読み込む）
+from scraper.records_io import NDJSON_EXTENSIONS, read_ndjson_frame
 
 if JSON_AVAILABLE:
     import json
 
-@st.cache_data
-def load_nba_data(data_dir='nba_data'):
-    """NBA データを読み込み（サイレントモード）"""
-    data = {}
-    
+# データセット名とファイル名の対応（シーズン別パーティションがない場合の従来形式）
+FILE_MAPPINGS = {
+    'per_game': 'nba_2025_per_game_stats.json',
+    'advanced': 'nba_2025_advanced_stats.json',
+    'play_by_play': 'nba_2025_play_by_play_stats.json',
+    'team_salaries': 'nba_team_salaries_2025.json',
+    'player_salaries': 'nba_player_salaries_2025.json'
+}
+
+# サラリーはシーズン別に保存されないため、常にデータディレクトリ直下のファイルを使う
+SALARY_FILE_MAPPINGS = {
+    key: FILE_MAPPINGS[key] for key in ('team_salaries', 'player_salaries')
+}
+
+# 改行区切りJSONを読み込む行数の単位（中間の辞書のリストはこの行数分だけ）
+JSON_CHUNK_ROWS = 5000
+
+# 直近の読み込みにかかったファイル別の秒数
+_last_load_timings = {}
+
+def load_nba_data(data_dir='nba_data', lazy=True, seasons=None):
+    """NBA データを読み込み（サイレントモード・各データセットは初回アクセス時に読み込み）
+
+    seasons: シーズン（2025）・範囲（range(2020, 2026)）・リストで指定。Noneは最新シーズン
+    （パーティションがあり、指定したシーズンがどれも存在しない場合は ValueError）
+    """
     if not os.path.exists(data_dir):
         # サイレントでサンプルデータを返す
-        return create_sample_data()
-    
-    file_mappings = {
-        'per_game': 'nba_2025_per_game_stats.json',
-        'advanced': 'nba_2025_advanced_stats.json',
-        'play_by_play': 'nba_2025_play_by_play_stats.json',
-        'team_salaries': 'nba_team_salaries_2025.json',
-        'player_salaries': 'nba_player_salaries_2025.json'
-    }
+        return load_sample_data()
     
-    files_loaded = 0
+    data = LazyNBAData(data_dir, get_file_mappings(data_dir, seasons), load_dataset_file_shared)
     
-    # サイレントでファイルを読み込み（UIメッセージなし）
-    for key, filename in file_mappings.items():
-        filepath = os.path.join(data_dir, filename)
-        
-        try:
-            if os.path.exists(filepath):
-                df = load_json_file(filepath)
-                
-                if not df.empty:
-                    df = convert_numeric_columns(df)
-                    # 2TM、3TM等の複数チーム移籍レコードを除外
-                    df = filter_multi_team_records(df)
-                    data[key] = df
-                    files_loaded += 1
-                else:
-                    data[key] = pd.DataFrame()
-            else:
-                data[key] = pd.DataFrame()
-                
-        except Exception:
-            # エラーも表示せず、空のDataFrameを設定
-            data[key] = pd.DataFrame()
-    
-    if files_loaded == 0:
+    if not any(data.has_source(key) for key in data):
         # サイレントでサンプルデータを返す
-        return create_sample_data()
+        return load_sample_data()
+    
+    if not lazy:
+        data.preload()
     
     # 何も表示せずに結果を返す
     return data
 
+def get_file_mappings(data_dir, seasons=None):
+    """読み込むファイルの対応（シーズン別パーティションがあれば選択シーズン分）"""
+    available = list_available_seasons(data_dir)
+    if not available:
+        # パーティションのない旧形式のデータ
+        return prefer_streaming_files(data_dir, FILE_MAPPINGS)
+    
+    selected = normalize_seasons(seasons, available)
+    if not selected:
+        # 旧形式のファイルやサンプルデータに黙って切り替えない
+        requested = [seasons] if isinstance(seasons, int) else list(seasons)
+        raise ValueError(f"Season(s) {requested} not available (available: {available})")
+    return prefer_streaming_files(data_dir, {**build_season_file_mappings(selected), **SALARY_FILE_MAPPINGS})
+
+def select_seasons(data_dir='nba_data'):
+    """サイドバーでシーズン（範囲）を選択し、load_nba_data の seasons に渡す値を返す（既定は最新シーズン）"""
+    available = list_available_seasons(data_dir)
+    if len(available) < 2:
+        return None
+    
+    start, end = st.sidebar.select_slider(
+        "シーズン:", options=available, value=(available[-1], available[-1]), key='season_range'
+    )
+    return start if start == end else range(start, end + 1)
+
+def resolve_data_file(data_dir, filename):
+    """同名の改行区切りJSON（.ndjson/.jsonl）があればそのファイル名、なければ元のファイル名"""
+    base_name = os.path.splitext(filename)[0]
+    for extension in NDJSON_EXTENSIONS:
+        if os.path.exists(os.path.join(data_dir, base_name + extension)):
+            return base_name + extension
+    return filename
+
+def prefer_streaming_files(data_dir, file_mappings):
+    """ファイル対応の各ファイルを改行区切りJSON優先に置き換え"""
+    return {
+        key: tuple(resolve_data_file(data_dir, name) for name in filename)
+        if isinstance(filename, tuple) else resolve_data_file(data_dir, filename)
+        for key, filename in file_mappings.items()
+    }
+
+@st.cache_data
+def load_sample_data():
+    """サンプルデータを作成（キャッシュ付き）"""
+    return create_sample_data()
+
+def load_dataset_file_shared(filepath, dataset, changes=None):
+    """プロセス共有ストアからデータセットのビューを取得（ファイル更新時は再読み込み）
+
+    changes: dictを渡すと、この呼び出しで共有ストアへ反映したファイル別の更新内容を記録
+    """
+    if isinstance(filepath, tuple):
+        return load_season_files_shared(filepath, dataset, changes)
+    
+    stat = os.stat(filepath)
+    version = (stat.st_size, stat.st_mtime_ns)
+    return get_shared_store().get_view(
+        (filepath, dataset),
+        version,
+        lambda: _load_dataset_snapshot(filepath, dataset, changes),
+        # 保持中のデータから変更履歴をたどれる場合は差分だけを適用
+        lambda frame, old_version: _apply_dataset_changes(filepath, dataset, frame, old_version, version, changes)
+    )
+
+def load_season_files_shared(filepaths, dataset, changes=None):
+    """複数シーズンのパーティションを結合したビューを取得（いずれかの更新時は再結合）"""
+    version = tuple(
+        (os.stat(filepath).st_size, os.stat(filepath).st_mtime_ns)
+        for filepath in filepaths
+    )
+    
+    def load_combined():
+        # シーズン単位のビューは共有ストアに個別に載るため、範囲を変えても再パースしない
+        with ThreadPoolExecutor(max_workers=len(filepaths)) as executor:
+            frames = list(executor.map(lambda path: load_dataset_file_shared(path, dataset, changes), filepaths))
+        return concat_season_frames(frames)
+    
+    # 範囲ごとのエントリは共有ストアのLRUで上限を超えた分から破棄される
+    return get_shared_store().get_view(('seasons', dataset, filepaths), version, load_combined)
+
+def _load_dataset_snapshot(filepath, dataset, changes=None):
+    """データセットを読み込み、読み込み時間を記録"""
+    df, elapsed = _timed_load_dataset_file(filepath, dataset)
+    _last_load_timings[dataset] = elapsed
+    if changes is not None:
+        changes[filepath] = {'dataset': dataset, 'mode': 'full', 'rows': len(df)}
+    # 派生テーブルのキャッシュキーとして内容ハッシュを付与（読み込み時に一度だけ計算）
+    df.attrs['content_hash'] = compute_frame_hash(df)
+    return df
+
+def _apply_dataset_changes(filepath, dataset, frame, old_version, new_version, changes=None):
+    """保持中のデータに変更履歴を適用（履歴がつながらなければNoneで全件読み込みに戻す）"""
+    entries = find_change_chain(read_changelog(filepath), old_version, new_version)
+    if not entries:
+        return None
+    
+    df = apply_row_changes(
+        frame,
+        entries,
+        lambda rows: prepare_dataset_frame(rows, filepath, dataset)
+    )
+    if df is None:
+        return None
+    
+    if changes is not None:
+        changes[filepath] = {'dataset': dataset, 'mode': 'delta', **count_row_changes(entries)}
+    # 内容が変わったデータセットに依存する派生テーブルだけがハッシュの変化で作り直される
+    df.attrs['content_hash'] = compute_frame_hash(df)
+    return df
+
+def clear_loaded_data():
+    """読み込み済みデータとキャッシュを全て破棄"""
+    st.cache_data.clear()
+    get_shared_store().clear()
+
+def refresh_loaded_data(data):
+    """更新されたファイルのみ共有ストアに反映し、ファイル別の更新内容を返す"""
+    if not isinstance(data, LazyNBAData):
+        # サンプルデータはファイルと対応しないため全て破棄
+        clear_loaded_data()
+        return {}
+    
+    # 変更履歴があるファイルは差分のみ適用、変わっていないファイルはそのまま
+    return data.refresh()
+
+def describe_refresh_changes(changes):
+    """refresh_loaded_data の結果を表示用の文に変換"""
+    messages = []
+    for filepath, info in sorted(changes.items()):
+        season = get_partition_season(filepath)
+        label = f"{info['dataset']} ({season})" if season is not None else info['dataset']
+        if info['mode'] == 'delta':
+            messages.append(f"{label}: 差分を適用（更新 {info['upserts']} 行・削除 {info['deletes']} 件）")
+        else:
+            messages.append(f"{label}: 全件を読み込み（{info['rows']} 行）")
+    return messages
+
+def _timed_load_dataset_file(filepath, dataset):
+    """load_dataset_file を実行し、(DataFrame, 秒数) を返す"""
+    started = time.perf_counter()
+    df = load_dataset_file(filepath, dataset)
+    return df, time.perf_counter() - started
+
+def get_load_timings():
+    """直近のデータ読み込みにかかったファイル別の秒数を取得"""
+    return dict(_last_load_timings)
+
+def is_dataset_loaded(data, key):
+    """データセットが既にメモリ上にあるか（通常のdictは常にTrue）"""
+    if isinstance(data, LazyNBAData):
+        return data.is_loaded(key)
+    return key in data
+
+def get_dataset_record_counts(data):
+    """データセットごとのレコード数を取得（遅延読み込み時は読み込まずにメタデータを利用、不明ならNone）"""
+    if isinstance(data, LazyNBAData):
+        return {key: data.record_count(key) for key in data}
+    return {key: len(df) for key, df in data.items()}
+
+def load_dataset_file(filepath, dataset):
+    """データセットファイルを読み込み（有効なParquetキャッシュがあれば優先）"""
+    df = load_cached_frame(filepath)
+    if df is not None:
+        return df
+    
+    df = load_json_file(filepath)
+    
+    if not df.empty:
+        df = prepare_dataset_frame(df, filepath, dataset)
+        # 次回起動時はJSONのパースと型変換を省略
+        write_cached_frame(filepath, df)
+    
+    return df
+
+def prepare_dataset_frame(df, filepath, dataset):
+    """読み込んだ行に型変換・フィルタ・シーズン列の付与を行う"""
+    # 宣言済みスキーマで型を一括変換
+    df = apply_schema(df, dataset)
+    # 2TM、3TM等の複数チーム移籍レコードを除外
+    df = filter_multi_team_records(df)
+    # シーズン別パーティションのファイルにはシーズン列を付与
+    season = get_partition_season(filepath)
+    if season is not None:
+        df = df.assign(Season=pd.Series(season, index=df.index, dtype='int16'))
+    return df
+
 def load_json_file(filepath):
     """JSONファイルを読み込んでDataFrameに変換"""
     if not JSON_AVAILABLE:
         raise ImportError("JSONライブラリが利用できません")
     
+    if os.path.splitext(filepath)[1].lower() in NDJSON_EXTENSIONS:
+        return load_ndjson_file(filepath)
+    
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             json_data = json.load(f)
@@ -84,16 +279,15 @@ def load_json_file(filepath):
     except Exception as e:
         raise Exception(f"ファイル読み込みエラー: {e}")
 
-def convert_numeric_columns(df):
-    """数値カラムの変換"""
-    # テキストカラムを除外
-    text_columns = ['Team', 'Tm', 'player_name', 'team', 'source', 'Player', 'name']
-    
-    for col in df.columns:
-        if col not in text_columns:
-            df[col] = pd.to_numeric(df[col], errors='ignore')
-    
-    return df
+def load_ndjson_file(filepath, chunk_rows=JSON_CHUNK_ROWS):
+    """改行区切りJSONをチャンクごとにカラム配列へ変換して結合（ファイル全体の辞書のリストを作らない）"""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return read_ndjson_frame(f, chunk_rows)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSONデコードエラー: {e}")
+    except Exception as e:
+        raise Exception(f"ファイル読み込みエラー: {e}")
 
 def validate_data_structure(data):
     """データ構造の検証"""
@@ -126,7 +320,7 @@ def get_data_summary(data):
             summary[key] = {
                 'records': len(df),
                 'columns': len(df.columns),
-                'memory_usage': df.memory_usage(deep=True).sum(),
+                'memory_usage': frame_nbytes(df),
                 'null_values': df.isnull().sum().sum()
             }
         else:
@@ -145,6 +339,7 @@ def display_data_validation_report(data):
     
     validation_results = validate_data_structure(data)
     summary = get_data_summary(data)
+    timings = get_load_timings()
     
     # 検証結果テーブル
     validation_df = pd.DataFrame([
@@ -152,7 +347,8 @@ def display_data_validation_report(data):
             'Dataset': dataset,
             'Status': status,
             'Records': summary.get(dataset, {}).get('records', 0),
-            'Columns': summary.get(dataset, {}).get('columns', 0)
+            'Columns': summary.get(dataset, {}).get('columns', 0),
+            'Load (s)': round(timings.get(dataset, 0.0), 3)
         }
         for dataset, status in validation_results.items()
     ])
@@ -162,6 +358,12 @@ def display_data_validation_report(data):
     # メモリ使用量
     total_memory = sum(info.get('memory_usage', 0) for info in summary.values())
     st.info(f"💾 総メモリ使用量: {total_memory / 1024 / 1024:.2f} MB")
+    st.info(f"🤝 全セッション共有データ: {get_shared_store().memory_usage() / 1024 / 1024:.2f} MB")
+    
+    # 並列読み込みのため、起動時間は最も遅いファイルで決まる
+    if timings:
+        slowest = max(timings, key=timings.get)
+        st.info(f"⏱️ 最長読み込み: {slowest} ({timings[slowest]:.2f} 秒)")
     
     return validation_results
 
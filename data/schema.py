@@ -0,0 +1,172 @@
+import re
+import numpy as np
+import pandas as pd
+
+# データセットごとのカラム型定義
+# 'text' は文字列のまま保持、'category' はチーム・ポジション等の繰り返し値
+TEXT = 'text'
+CATEGORY = 'category'
+
+# 選手スタッツ共通（Basketball-Reference の per_game / advanced）
+_PLAYER_IDENTITY_SCHEMA = {
+    'Rk': 'int16',
+    'Player': TEXT,
+    'Age': 'int16',
+    'Team': CATEGORY,
+    'Tm': CATEGORY,
+    'Pos': CATEGORY,
+    'G': 'int16',
+    'GS': 'int16',
+    'Awards': TEXT
+}
+
+PER_GAME_SCHEMA = {
+    **_PLAYER_IDENTITY_SCHEMA,
+    'MP': 'float32',
+    'FG': 'float32',
+    'FGA': 'float32',
+    'FG%': 'float32',
+    '3P': 'float32',
+    '3PA': 'float32',
+    '3P%': 'float32',
+    '2P': 'float32',
+    '2PA': 'float32',
+    '2P%': 'float32',
+    'eFG%': 'float32',
+    'FT': 'float32',
+    'FTA': 'float32',
+    'FT%': 'float32',
+    'ORB': 'float32',
+    'DRB': 'float32',
+    'TRB': 'float32',
+    'REB': 'float32',
+    'AST': 'float32',
+    'STL': 'float32',
+    'BLK': 'float32',
+    'TOV': 'float32',
+    'PF': 'float32',
+    'PTS': 'float32'
+}
+
+ADVANCED_SCHEMA = {
+    **_PLAYER_IDENTITY_SCHEMA,
+    'MP': 'int16',  # advanced のMPはシーズン合計
+    'PER': 'float32',
+    'TS%': 'float32',
+    '3PAr': 'float32',
+    'FTr': 'float32',
+    'ORB%': 'float32',
+    'DRB%': 'float32',
+    'TRB%': 'float32',
+    'AST%': 'float32',
+    'STL%': 'float32',
+    'BLK%': 'float32',
+    'TOV%': 'float32',
+    'USG%': 'float32',
+    'OWS': 'float32',
+    'DWS': 'float32',
+    'WS': 'float32',
+    'WS/48': 'float32',
+    'OBPM': 'float32',
+    'DBPM': 'float32',
+    'BPM': 'float32',
+    'VORP': 'float32',
+    # チーム行（サンプルデータ等）
+    'ORtg': 'float32',
+    'DRtg': 'float32',
+    'Pace': 'float32'
+}
+
+PLAY_BY_PLAY_SCHEMA = {
+    **_PLAYER_IDENTITY_SCHEMA
+}
+
+TEAM_SALARIES_SCHEMA = {
+    'team': CATEGORY,
+    'total_salary': 'int64',
+    'avg_salary': 'float64',
+    'salary_count': 'int16',
+    'player_count': 'int16',
+    'salary_millions': 'float32'
+}
+
+PLAYER_SALARIES_SCHEMA = {
+    'player_name': TEXT,
+    'team': CATEGORY,
+    'current_salary': 'int32',
+    'rank': 'int16',
+    'final_rank': 'int16',
+    'source': CATEGORY
+}
+
+DATASET_SCHEMAS = {
+    'per_game': PER_GAME_SCHEMA,
+    'advanced': ADVANCED_SCHEMA,
+    'play_by_play': PLAY_BY_PLAY_SCHEMA,
+    'team_salaries': TEAM_SALARIES_SCHEMA,
+    'player_salaries': PLAYER_SALARIES_SCHEMA
+}
+
+# 列名が可変のカラム（将来年度のサラリー等）
+COLUMN_PATTERNS = [
+    (re.compile(r'^salary_year_\d+$'), 'int32')
+]
+
+# スキーマ未定義のデータセットでも文字列として扱うカラム
+DEFAULT_TEXT_COLUMNS = ['Team', 'Tm', 'player_name', 'team', 'source', 'Player', 'name']
+
+def resolve_column_dtype(dataset, column):
+    """カラムの宣言型を取得（未定義ならNone）"""
+    schema = DATASET_SCHEMAS.get(dataset, {})
+    if column in schema:
+        return schema[column]
+
+    for pattern, dtype in COLUMN_PATTERNS:
+        if pattern.match(str(column)):
+            return dtype
+
+    if dataset not in DATASET_SCHEMAS and column in DEFAULT_TEXT_COLUMNS:
+        return TEXT
+
+    return None
+
+def _coerce_numeric(series, dtype):
+    """宣言された数値型へ変換（不正値はNaN、欠損がある整数列は浮動小数へ）"""
+    values = pd.to_numeric(series, errors='coerce')
+    target = np.dtype(dtype)
+
+    if target.kind in 'iu' and values.isna().any():
+        # 小さい整数は float32、サラリー等の大きな整数は精度を保つため float64
+        target = np.dtype('float32') if target.itemsize <= 2 else np.dtype('float64')
+
+    return values.astype(target)
+
+def _coerce_undeclared(series):
+    """未定義カラムは欠損を増やさずに数値化できる場合のみ変換"""
+    if series.dtype != object:
+        return series
+
+    values = pd.to_numeric(series, errors='coerce')
+    if values.isna().sum() == series.isna().sum():
+        return values
+    return series
+
+def apply_schema(df, dataset):
+    """データセットのスキーマに従ってカラム型を一括変換"""
+    converted = {}
+
+    for col in df.columns:
+        dtype = resolve_column_dtype(dataset, col)
+        series = df[col]
+
+        if dtype == TEXT:
+            converted[col] = series
+        elif dtype == CATEGORY:
+            converted[col] = series.astype('category')
+        elif dtype is not None:
+            converted[col] = _coerce_numeric(series, dtype)
+        else:
+            converted[col] = _coerce_undeclared(series)
+
+    # カラムごとの代入ではなく一度にDataFrameを組み立てる
+    return pd.DataFrame(converted, index=df.index, columns=df.columns)
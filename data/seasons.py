@@ -0,0 +1,81 @@
+import hashlib
+import os
+import re
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# シーズン別パーティション: <data_dir>/season=YYYY/<dataset>.json
+SEASON_PARTITION_PATTERN = re.compile(r'^season=(\d{4})$')
+
+# シーズン別に保存されるデータセット（サラリーは現行シーズンのみのため対象外）
+SEASON_DATASETS = ['per_game', 'advanced', 'play_by_play']
+
+def season_partition_name(season):
+    """シーズンのパーティションディレクトリ名"""
+    return f'season={int(season)}'
+
+def get_partition_season(filepath):
+    """ファイルパスが属するシーズン（パーティション外ならNone）"""
+    match = SEASON_PARTITION_PATTERN.match(os.path.basename(os.path.dirname(filepath)))
+    return int(match.group(1)) if match else None
+
+def list_available_seasons(data_dir):
+    """パーティションが存在するシーズンの一覧（昇順）"""
+    if not os.path.isdir(data_dir):
+        return []
+
+    seasons = []
+    for name in os.listdir(data_dir):
+        match = SEASON_PARTITION_PATTERN.match(name)
+        if match and os.path.isdir(os.path.join(data_dir, name)):
+            seasons.append(int(match.group(1)))
+    return sorted(seasons)
+
+def normalize_seasons(seasons, available):
+    """シーズン指定（単一・範囲・リスト、Noneは最新）を存在するシーズンのリストに変換"""
+    if not available:
+        return []
+    if seasons is None:
+        return [available[-1]]
+    if isinstance(seasons, int):
+        seasons = [seasons]
+    return sorted(set(int(season) for season in seasons) & set(available))
+
+def build_season_file_mappings(seasons):
+    """データセット名 → パーティション内のファイル（複数シーズンはタプル）"""
+    mappings = {}
+    for dataset in SEASON_DATASETS:
+        filenames = tuple(
+            os.path.join(season_partition_name(season), f'{dataset}.json')
+            for season in seasons
+        )
+        mappings[dataset] = filenames[0] if len(filenames) == 1 else filenames
+    return mappings
+
+def align_categories(frames):
+    """結合前にカテゴリ型カラムのカテゴリを揃えた浅いコピーを作成"""
+    # カテゴリが異なるまま結合すると object 型に戻ってしまうため
+    aligned = [df.copy(deep=False) for df in frames]
+    for col in frames[0].columns:
+        parts = [df[col] for df in frames if col in df.columns]
+        if len(parts) == len(frames) and all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            categories = union_categoricals(parts, ignore_order=True).categories
+            for df in aligned:
+                df[col] = df[col].cat.set_categories(categories)
+    return aligned
+
+def concat_season_frames(frames):
+    """シーズン別のDataFrameを結合（カテゴリ型はカテゴリを統合して維持）"""
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    combined = pd.concat(align_categories(frames), ignore_index=True)
+    # 各シーズンの内容ハッシュから結合後のハッシュを算出（再計算しない）
+    part_hashes = [df.attrs.get('content_hash') for df in frames]
+    combined.attrs = {}
+    if all(part_hashes):
+        combined.attrs['content_hash'] = hashlib.sha256('|'.join(part_hashes).encode('utf-8')).hexdigest()
+    return combined
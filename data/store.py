@@ -0,0 +1,113 @@
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+def freeze_frame(df):
+    """全カラムを読み取り専用のNumPy配列に置き換えたDataFrameを作成"""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = np.array(series.cat.codes.to_numpy(), copy=True)
+            codes.flags.writeable = False
+            columns[col] = pd.Categorical.from_codes(codes, dtype=series.dtype)
+        else:
+            values = np.array(series.to_numpy(), copy=True)
+            values.flags.writeable = False
+            columns[col] = values
+
+    # copy=False でブロックを統合せず、読み取り専用配列をそのまま保持
+    frozen = pd.DataFrame(columns, index=df.index, columns=df.columns, copy=False)
+    frozen.attrs = dict(df.attrs)
+    return frozen
+
+# 共有ストアに保持する上限（超えたら最も長く使われていないものから破棄）
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+def frame_nbytes(df):
+    """DataFrameのメモリ使用量（バイト）"""
+    total = int(df.index.memory_usage(deep=True))
+    for col in df.columns:
+        series = df[col]
+        try:
+            total += int(series.memory_usage(index=False, deep=True))
+        except ValueError:
+            # 読み取り専用のobject配列は deep=True で計測できないため、要素ごとに合計
+            total += int(series.memory_usage(index=False)) + sum(map(sys.getsizeof, series.to_numpy()))
+    return total
+
+class SharedDataStore:
+    """プロセス内の全セッションで共有する読み取り専用データストア（件数・サイズ上限付きのLRU）"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key → (version, frame, バイト数)、末尾ほど最近使われたもの
+        self._entries = OrderedDict()
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _get_key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get_view(self, key, version, load_func, update_func=None):
+        """共有DataFrameのゼロコピービューを取得（versionが変われば再読み込み）
+
+        update_func(frame, old_version) を渡すと、保持中のデータから新しいversionの
+        データを作れる場合（差分の適用等）はそちらを使う。Noneを返せば再読み込み。
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            # 同時アクセス時も読み込みは1回だけ
+            with self._get_key_lock(key):
+                entry = self._entries.get(key)
+                if entry is None or entry[0] != version:
+                    frame = None
+                    if entry is not None and update_func is not None:
+                        frame = update_func(entry[1], entry[0])
+                    if frame is None:
+                        frame = load_func()
+                    frame = freeze_frame(frame)
+                    entry = (version, frame, frame_nbytes(frame))
+                    with self._lock:
+                        self._entries[key] = entry
+                        self._entries.move_to_end(key)
+                        self._evict(key)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+        # 浅いコピー：カラムの追加はビューのみに反映され、値の書き換えはエラーになる
+        return entry[1].copy(deep=False)
+
+    def _evict(self, keep_key):
+        """上限を超えた分を古い順に破棄（keep_key は残す、self._lock を保持して呼ぶ）"""
+        total = sum(entry[2] for entry in self._entries.values())
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries and total <= self.max_bytes:
+                break
+            if key == keep_key:
+                continue
+            total -= self._entries.pop(key)[2]
+            self._key_locks.pop(key, None)
+
+    def clear(self):
+        """全ての共有データを破棄"""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+    def memory_usage(self):
+        """共有データの合計メモリ使用量（バイト）"""
+        return sum(entry[2] for entry in list(self._entries.values()))
+
+@st.cache_resource
+def get_shared_store():
+    """プロセス共通のデータストアを取得"""
+    return SharedDataStore()
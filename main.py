@@ -14,7 +14,10 @@ if 'config_setup' not in st.session_state:
 
 # データローダーのインポート
 try:
-    from data.loader import load_nba_data
+    from data.loader import (
+        load_nba_data, get_dataset_record_counts, is_dataset_loaded,
+        refresh_loaded_data, describe_refresh_changes, select_seasons
+    )
 except ImportError as e:
     st.error(f"データローダーのインポートに失敗しました: {e}")
     st.stop()
@@ -46,9 +49,12 @@ def main():
     st.title("🏀 NBA 2024-25 Analytics Dashboard")
     st.markdown("---")
     
+    # シーズン別データがあればシーズン（範囲）を選択（既定は最新シーズン）
+    seasons = select_seasons()
+    
     # データ読み込み（サイレント）
     try:
-        data = load_nba_data()
+        data = load_nba_data(seasons=seasons)
     except Exception as e:
         st.error(f"データの読み込みに失敗しました: {e}")
         st.stop()
@@ -106,9 +112,22 @@ def main():
     # フッター
     st.markdown("---")
     st.markdown("### 🔄 Data Refresh")
-    if st.button("データを再読み込み"):
-        st.cache_data.clear()
-        st.rerun()
+    # ページがデータを読む前に反映するため、再読み込みはコールバックで行う
+    st.button("データを再読み込み", on_click=handle_data_refresh, args=(data,))
+    
+    changes = st.session_state.pop('data_refresh_changes', None)
+    if changes is not None:
+        messages = describe_refresh_changes(changes)
+        if messages:
+            for message in messages:
+                st.success(message)
+        else:
+            st.info("更新されたデータはありません")
+
+def handle_data_refresh(data):
+    """再読み込みボタンのコールバック（次の実行でページを描画する前に呼ばれる）"""
+    # 更新されたファイルのみ反映（変更履歴があれば差分だけを適用）
+    st.session_state['data_refresh_changes'] = refresh_loaded_data(data)
 
 def display_data_info(data):
     """データ情報をサイドバーに表示"""
@@ -116,10 +135,14 @@ def display_data_info(data):
     st.sidebar.markdown("### 📅 Data Info")
     st.sidebar.info(f"最終更新: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     
+    # レコード数は遅延読み込み中でもメタデータから取得（未使用のデータセットは読み込まない）
+    # 未読み込みでメタデータもないデータセットは None（ソースファイルはあるが件数不明）
+    record_counts = get_dataset_record_counts(data)
+    
     # データソースの表示
-    if any(not df.empty for df in data.values()):
-        # 実データが存在するかチェック
-        has_real_data = any(len(df) > 50 for df in data.values() if not df.empty)
+    if any(count is None or count > 0 for count in record_counts.values()):
+        # 実データが存在するかチェック（サンプルデータは遅延読み込みされないため、件数不明は実データ）
+        has_real_data = any(count is None or count > 50 for count in record_counts.values())
         if has_real_data:
             st.sidebar.success("📊 実際のNBAデータを使用")
         else:
@@ -127,9 +150,11 @@ def display_data_info(data):
     
     # データセット情報
     dataset_info = []
-    for key, df in data.items():
-        if not df.empty:
-            dataset_info.append(f"✅ {key}: {len(df)} records")
+    for key, count in record_counts.items():
+        if count is None:
+            dataset_info.append(f"✅ {key}: 未読み込み")
+        elif count > 0:
+            dataset_info.append(f"✅ {key}: {count} records")
         else:
             dataset_info.append(f"❌ {key}: No data")
     
@@ -142,15 +167,21 @@ def display_data_info(data):
                 st.sidebar.warning(info)
     
     # 追加情報
-    if 'per_game' in data and not data['per_game'].empty:
-        st.sidebar.info(f"チーム数: {len(data['per_game'])} teams")
-    
-    if 'advanced' in data and not data['advanced'].empty:
-        player_count = len(data['advanced'][data['advanced']['Player'].notna()]) if 'Player' in data['advanced'].columns else 0
+    if record_counts.get('per_game'):
+        st.sidebar.info(f"チーム数: {record_counts['per_game']} teams")
+    
+    if record_counts.get('advanced'):
+        if not is_dataset_loaded(data, 'advanced'):
+            player_count = record_counts['advanced']
+        elif 'Player' in data['advanced'].columns:
+            player_count = int(data['advanced']['Player'].notna().sum())
+        else:
+            player_count = 0
         if player_count > 0:
             st.sidebar.info(f"プレイヤー数: {player_count} players")
     
-    if 'player_salaries' in data and not data['player_salaries'].empty:
+    salary_count = record_counts.get('player_salaries', 0)
+    if salary_count is None or salary_count > 0:
         st.sidebar.success("✅ プレイヤーサラリーデータあり")
     else:
         st.sidebar.warning("⚠️ サンプルサラリーデータを使用")
@@ -3,7 +3,7 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 from config import PLOTLY_AVAILABLE, safe_plotly_chart
-from utils.helpers import filter_multi_team_records
+from data.derived import get_derived_table
 
 def create_page(data):
     """アドバンスト分析ページ"""
@@ -28,7 +28,7 @@ def create_page(data):
     st.write(f"📊 Advanced データ: {len(df)} レコード")
     
     # チームデータとプレイヤーデータを分離
-    team_df = get_team_data(df, data)
+    team_df = get_team_data(data)
     
     if not PLOTLY_AVAILABLE:
         st.error("Plotlyが利用できません。")
@@ -47,17 +47,10 @@ def create_page(data):
     # サマリー表示
     display_team_summary(team_df)
 
-def get_team_data(df, data):
+def get_team_data(data):
     """チームデータを取得または生成"""
-    team_df = pd.DataFrame()
-    
-    # 既存のチームデータをチェック
-    df = filter_multi_team_records(df)
-    if 'Team' in df.columns:
-        if 'Player' in df.columns:
-            team_df = df[df['Player'].isna() & df['Team'].notna()]
-        else:
-            team_df = df[df['Team'].notna()]
+    # 既存のチームデータをチェック（読み込み時に分割済みの派生テーブル）
+    team_df = get_derived_table(data, 'advanced_teams')
     
     # チームデータが空の場合、per_gameデータから生成
     if team_df.empty and 'per_game' in data and not data['per_game'].empty:
@@ -3,7 +3,8 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 from config import PLOTLY_AVAILABLE, safe_plotly_chart
-from utils.helpers import filter_multi_team_records
+from data.loader import get_dataset_record_counts
+from data.derived import get_derived_table, DERIVED_TABLES
 
 def create_page(data):
     """データエクスプローラーページ"""
@@ -41,20 +42,26 @@ def create_page(data):
     )
     
     if dataset_choice in data:
-        explore_dataset(data[dataset_choice], dataset_choice)
+        explore_dataset(get_filtered_dataset(data, dataset_choice), dataset_choice)
 
 def get_available_datasets(data):
-    """利用可能なデータセットのリストを取得"""
+    """利用可能なデータセットのリストを取得（選択されたデータセットのみ読み込む）"""
     available_datasets = []
-    for key, df in data.items():
-        if not df.empty:
+    for key, count in get_dataset_record_counts(data).items():
+        # None は未読み込みで件数不明（ソースファイルはある）
+        if count is None or count > 0:
             available_datasets.append(key)
     return available_datasets
 
+def get_filtered_dataset(data, dataset_name):
+    """複数チーム移籍レコード除外済みのデータセットを取得"""
+    table_name = f'filtered_{dataset_name}'
+    if table_name in DERIVED_TABLES:
+        return get_derived_table(data, table_name)
+    return data[dataset_name]
+
 def explore_dataset(df, dataset_name):
     """データセットの探索"""
-    df = filter_multi_team_records(df.copy())
-    
     # データセット概要
     display_dataset_overview(df, dataset_name)
     
@@ -3,7 +3,11 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 from config import PLOTLY_AVAILABLE, safe_plotly_chart, format_currency
-from utils.helpers import filter_multi_team_records
+from utils.helpers import RangeFilterIndex
+from data.derived import (
+    get_derived_table, get_salary_match_coverage, identify_player_column, identify_salary_column,
+    build_salary_efficiency, EFFICIENCY_METRICS
+)
 
 def create_page(data):
     """サラリー効率分析ページ（ゲーム数フィルタリング対応版）"""
@@ -24,9 +28,8 @@ def create_page(data):
         st.error("アドバンスト統計データが見つかりません")
         return
     
-    # プレイヤーデータのみを抽出
-    df = filter_multi_team_records(data['advanced'].copy())
-    player_df = df[df['Player'].notna()] if 'Player' in df.columns else pd.DataFrame()
+    # プレイヤーデータのみを抽出（読み込み時に分割済みの派生テーブル）
+    player_df = get_derived_table(data, 'advanced_players')
     
     if player_df.empty:
         st.error("プレイヤーデータが見つかりません")
@@ -57,7 +60,7 @@ def process_salary_data_enhanced(data, player_df):
     merged_df = pd.DataFrame()
     
     if 'player_salaries' in data and not data['player_salaries'].empty:
-        salary_df = data['player_salaries'].copy()
+        salary_df = data['player_salaries']
         st.info(f"💰 {len(salary_df)} プレイヤーのサラリーデータを確認中...")
         
         # サラリーデータの構造を詳細分析
@@ -75,8 +78,15 @@ def process_salary_data_enhanced(data, player_df):
         if salary_player_col and salary_col:
             st.write(f"✅ 特定されたカラム: プレイヤー名='{salary_player_col}', サラリー='{salary_col}'")
             
-            # 強化されたマージを試行
-            merged_df = attempt_enhanced_merge(player_df, salary_df, salary_player_col, salary_col)
+            # 正規化名の選手IDで結合（データ読み込みごとに一度だけ実行される派生テーブル）
+            merged_df = get_derived_table(data, 'salary_efficiency')
+            
+            # 名前照合率（アクセント・Jr.等の表記ゆれを吸収した上での一致率）
+            coverage = get_salary_match_coverage(data)
+            st.write(f"🔗 名前照合: {coverage['matched']}/{coverage['total']} 件 ({coverage['rate']:.1%})")
+            if coverage['unmatched']:
+                with st.expander(f"照合できなかった選手名 ({len(coverage['unmatched'])}件)"):
+                    st.write(", ".join(coverage['unmatched']))
             
             if not merged_df.empty:
                 use_real_salary = True
@@ -90,74 +100,85 @@ def process_salary_data_enhanced(data, player_df):
     if not use_real_salary or merged_df.empty:
         st.info("🧪 サンプルサラリーデータを作成中...")
         merged_df = create_sample_salary_data_with_games(player_df)
+        st.success(f"✅ {len(merged_df)} プレイヤーのサンプルデータを作成しました（ゲーム数含む）")
     
     return merged_df
 
-def create_sample_salary_data_with_games(player_df):
-    """ゲーム数を含むサンプルサラリーデータの作成"""
-    np.random.seed(42)
-    players = player_df['Player'].unique()
-    
-    sample_data = []
-    for player in players:
-        player_stats = player_df[player_df['Player'] == player].iloc[0]
-        
-        # ゲーム数の生成（現実的な範囲）
-        games_played = np.random.randint(20, 82)  # NBAは最大82ゲーム
-        
-        # 出場時間の生成（ゲーム数に基づく）
-        minutes_per_game = np.random.uniform(15, 40)
-        total_minutes = games_played * minutes_per_game
-        
-        # パフォーマンス指標
-        per_value = pd.to_numeric(player_stats.get('PER', 15), errors='coerce')
-        per_value = per_value if not pd.isna(per_value) else 15
-        
-        # サラリー計算（ゲーム数とパフォーマンスに基づく）
-        base_salary = 2000000
-        game_bonus = games_played * 50000  # ゲーム出場ボーナス
-        performance_bonus = per_value * 400000
-        
-        # スター選手ボーナス
-        star_bonus = 0
-        if any(name in str(player) for name in ['LeBron', 'Stephen', 'Giannis', 'Luka']):
-            star_bonus = np.random.uniform(20000000, 30000000)
-        elif any(name in str(player) for name in ['Kevin', 'Joel', 'Nikola', 'Jayson']):
-            star_bonus = np.random.uniform(10000000, 20000000)
-        
-        # 最終サラリー
-        salary = base_salary + game_bonus + performance_bonus + star_bonus + np.random.uniform(-2000000, 5000000)
-        salary = max(salary, 1000000)  # 最低保証
-        salary = min(salary, 60000000)  # 上限
-        
-        sample_data.append({
-            'Player': player,
-            'Games_Played': games_played,
-            'Minutes_Per_Game': round(minutes_per_game, 1),
-            'Total_Minutes': round(total_minutes, 0),
-            'current_salary': int(salary),
-            'PER': per_value,
-            'Tm': player_stats.get('Tm', 'N/A')
-        })
+@st.cache_data
+def create_sample_salary_data_with_games(player_df, seed=42):
+    """ゲーム数を含むサンプルサラリーデータの作成（効率指標付き）"""
+    rng = np.random.default_rng(seed)
+    
+    # 各選手の最初のレコード（全選手分をまとめて生成）
+    player_stats = player_df[player_df['Player'].notna()].drop_duplicates(subset=['Player'])
+    players = player_stats['Player'].astype(str)
+    n_players = len(player_stats)
+    
+    # ゲーム数の生成（現実的な範囲、NBAは最大82ゲーム）
+    games_played = rng.integers(20, 82, size=n_players)
+    
+    # 出場時間の生成（ゲーム数に基づく）
+    minutes_per_game = rng.uniform(15, 40, size=n_players)
+    total_minutes = games_played * minutes_per_game
+    
+    # パフォーマンス指標
+    if 'PER' in player_stats.columns:
+        per_values = pd.to_numeric(player_stats['PER'], errors='coerce').fillna(15).to_numpy(dtype='float64')
+    else:
+        per_values = np.full(n_players, 15.0)
+    
+    # スター選手ボーナス
+    top_stars = players.str.contains('LeBron|Stephen|Giannis|Luka', regex=True).to_numpy()
+    stars = players.str.contains('Kevin|Joel|Nikola|Jayson', regex=True).to_numpy() & ~top_stars
+    star_bonus = np.select(
+        [top_stars, stars],
+        [rng.uniform(20000000, 30000000, size=n_players), rng.uniform(10000000, 20000000, size=n_players)],
+        default=0.0
+    )
+    
+    # サラリー計算（ゲーム数とパフォーマンスに基づく）
+    base_salary = 2000000
+    game_bonus = games_played * 50000  # ゲーム出場ボーナス
+    performance_bonus = per_values * 400000
     
-    salary_df = pd.DataFrame(sample_data)
+    # 最終サラリー（最低保証100万ドル、上限6000万ドル）
+    salary = base_salary + game_bonus + performance_bonus + star_bonus + rng.uniform(-2000000, 5000000, size=n_players)
+    salary = np.clip(salary, 1000000, 60000000)
+    
+    salary_df = pd.DataFrame({
+        'Player': player_stats['Player'].to_numpy(),
+        'Games_Played': games_played,
+        'Minutes_Per_Game': minutes_per_game.round(1),
+        'Total_Minutes': total_minutes.round(0),
+        'current_salary': salary.astype('int64'),
+        'PER': per_values
+    })
     
     # 元のプレイヤーデータとマージ
     merged_df = player_df.merge(salary_df[['Player', 'current_salary']], 
                                on='Player', how='inner')
     merged_df['Salary'] = merged_df['current_salary']
     
-    st.success(f"✅ {len(merged_df)} プレイヤーのサンプルデータを作成しました（ゲーム数含む）")
-    return merged_df
+    return build_salary_efficiency(merged_df)
+
+@st.cache_resource(max_entries=8)
+def get_range_filter_index(merged_df):
+    """フィルタ対象カラム（G / MP / Salary）のソート済みインデックスを作成"""
+    # G・MPは従来通り欠損を0として扱い、Salaryの欠損は常に除外
+    return RangeFilterIndex(merged_df, ['G', 'MP', 'Salary'], fill_values={'G': 0, 'MP': 0})
 
 def apply_game_based_filters(merged_df):
     """ゲーム数ベースのフィルタリングの適用"""
     st.subheader("🔧 フィルタリングオプション")
     col1, col2 = st.columns(2)
     
+    # スライダー操作のたびに型変換・ソートをやり直さないよう、同じデータではインデックスを再利用
+    filter_index = get_range_filter_index(merged_df)
+    mask = filter_index.all_rows()
+    
     with col1:
         # 最低ゲーム数でフィルタリング
-        if 'G' in merged_df.columns:
+        if 'G' in filter_index:
             min_games = st.slider(
                 "最低ゲーム数", 
                 min_value=10, 
@@ -165,22 +186,20 @@ def apply_game_based_filters(merged_df):
                 value=25,
                 help="指定したゲーム数以上プレイしたプレイヤーのみを表示"
             )
-            merged_df['G_numeric'] = pd.to_numeric(merged_df['G'], errors='coerce').fillna(0)
-            merged_df = merged_df[merged_df['G_numeric'] >= min_games]
-            st.write(f"ゲーム数フィルタ後: {len(merged_df)} プレイヤー")
+            mask &= filter_index.range_mask('G', lower=min_games)
+            st.write(f"ゲーム数フィルタ後: {int(mask.sum())} プレイヤー")
         else:
             # Gカラムがない場合はMPベースでフィルタリング
-            if 'MP' in merged_df.columns:
+            if 'MP' in filter_index:
                 min_minutes = st.slider("最低出場時間 (分/試合)", 5, 35, 15)
-                merged_df['MP_numeric'] = pd.to_numeric(merged_df['MP'], errors='coerce').fillna(0)
-                merged_df = merged_df[merged_df['MP_numeric'] >= min_minutes]
-                st.write(f"出場時間フィルタ後: {len(merged_df)} プレイヤー")
+                mask &= filter_index.range_mask('MP', lower=min_minutes)
+                st.write(f"出場時間フィルタ後: {int(mask.sum())} プレイヤー")
     
     with col2:
         # サラリー範囲でフィルタリング
-        if len(merged_df) > 0:
-            min_salary = int(merged_df['Salary'].min())
-            max_salary = int(merged_df['Salary'].max())
+        salary_bounds = filter_index.bounds('Salary', mask) if mask.any() else None
+        if salary_bounds is not None:
+            min_salary, max_salary = int(salary_bounds[0]), int(salary_bounds[1])
             if min_salary < max_salary:
                 salary_range = st.slider(
                     "サラリー範囲 (Million Dollar)",
@@ -189,13 +208,10 @@ def apply_game_based_filters(merged_df):
                     value=(min_salary//1000000, max_salary//1000000),
                     help="指定したサラリー範囲内のプレイヤーのみを表示"
                 )
-                merged_df = merged_df[
-                    (merged_df['Salary'] >= salary_range[0] * 1000000) &
-                    (merged_df['Salary'] <= salary_range[1] * 1000000)
-                ]
-                st.write(f"サラリーフィルタ後: {len(merged_df)} プレイヤー")
+                mask &= filter_index.range_mask('Salary', salary_range[0] * 1000000, salary_range[1] * 1000000)
+                st.write(f"サラリーフィルタ後: {int(mask.sum())} プレイヤー")
     
-    return merged_df
+    return merged_df[mask]
 
 def create_efficiency_analysis(merged_df):
     """効率分析の実行"""
@@ -227,14 +243,10 @@ def create_efficiency_analysis(merged_df):
     with col2:
         display_count = st.selectbox("表示するプレイヤー数:", [10, 15, 20, 25], index=0)
     
-    # 効率計算
+    # 効率指標はサラリー結合時に全指標分を計算済み（ゼロ除算・欠損はNaN）
     efficiency_col = selected_metric + '_per_million'
-    metric_values = pd.to_numeric(merged_df[selected_metric], errors='coerce').fillna(0)
-    merged_df[efficiency_col] = (metric_values / merged_df['Salary']) * 1000000
     
     # データクリーニング
-    merged_df = merged_df[merged_df[efficiency_col].notna()]
-    merged_df = merged_df[merged_df[efficiency_col] != float('inf')]
     merged_df = merged_df[merged_df[efficiency_col] > 0]
     
     if merged_df.empty:
@@ -253,40 +265,40 @@ def create_efficiency_analysis(merged_df):
 
 def display_ranking_table_with_games(merged_df, selected_metric, efficiency_col, display_count):
     """ゲーム数を含むランキングテーブルの表示"""
-    top_players = merged_df.nlargest(display_count, efficiency_col)
+    ranking_df = build_ranking_frame(merged_df, selected_metric, efficiency_col, display_count)
     
     st.subheader(f"🏆 Top {display_count} プレイヤー効率ランキング")
     
-    ranking_data = []
-    for i, (_, player) in enumerate(top_players.iterrows(), 1):
-        # ゲーム数の安全な取得
-        games_played = player.get('G', 'N/A')
-        if games_played != 'N/A':
-            games_played = int(games_played) if pd.notna(games_played) else 'N/A'
-        
-        # 出場時間の安全な取得
-        mp_per_game = player.get('MP', 0)
-        mp_per_game = pd.to_numeric(mp_per_game, errors='coerce')
-        mp_per_game = mp_per_game if not pd.isna(mp_per_game) else 0
-        
-        metric_value = pd.to_numeric(player[selected_metric], errors='coerce')
-        metric_value = metric_value if not pd.isna(metric_value) else 0
-        
-        ranking_data.append({
-            'Rank': i,
-            'Player': player['Player'],
-            'Team': player.get('Team', 'N/A'),
-            'Games': games_played,
-            'Min/Game': round(mp_per_game, 1),
-            selected_metric: round(metric_value, 3),
-            'Salary (M)': round(player['Salary'] / 1000000, 2),
-            'Efficiency': round(player[efficiency_col], 8)
-        })
-    
-    ranking_df = pd.DataFrame(ranking_data)
+    # 美しいテーブル表示（st.dataframe は値をエスケープして表示し、並べ替え等も可能）
+    st.dataframe(style_ranking_table(ranking_df, selected_metric), use_container_width=True)
+
+def build_ranking_frame(merged_df, selected_metric, efficiency_col, display_count):
+    """効率上位プレイヤーのランキング表をカラム単位で作成"""
+    top_players = merged_df.nlargest(display_count, efficiency_col)
     
-    # 美しいテーブル表示
-    st.dataframe(
+    def numeric_column(col):
+        return pd.to_numeric(top_players[col], errors='coerce') if col in top_players.columns else pd.Series(np.nan, index=top_players.index)
+    
+    # ゲーム数は欠損時 'N/A' 表示
+    games = numeric_column('G')
+    games = games.fillna(0).astype('int64').astype(object).where(games.notna(), 'N/A')
+    team = top_players['Team'].astype(object) if 'Team' in top_players.columns else 'N/A'
+    
+    return pd.DataFrame({
+        'Rank': np.arange(1, len(top_players) + 1),
+        'Player': top_players['Player'],
+        'Team': team,
+        'Games': games,
+        'Min/Game': numeric_column('MP').fillna(0).round(1),
+        selected_metric: numeric_column(selected_metric).fillna(0).round(3),
+        'Salary (M)': (top_players['Salary'] / 1000000).round(2),
+        'Efficiency': top_players[efficiency_col].round(8)
+    }).reset_index(drop=True)
+
+def style_ranking_table(ranking_df, selected_metric):
+    """ランキング表のスタイルを設定"""
+    # Styler は表示時にスタイルを計算し直すため、セッション間で共有せず毎回作成（上位数十行のみで軽量）
+    return (
         ranking_df.style
         .format({
             'Efficiency': '{:.8f}',
@@ -299,8 +311,7 @@ def display_ranking_table_with_games(merged_df, selected_metric, efficiency_col,
         .set_properties(**{
             'text-align': 'center',
             'font-size': '12px'
-        }),
-        use_container_width=True
+        })
     )
 
 def create_visualizations_with_games(merged_df, selected_metric, efficiency_col):
@@ -433,81 +444,6 @@ def display_summary_and_insights_with_games(merged_df, selected_metric, efficien
                 f"効率: {best_expensive[efficiency_col]:.6f}"
             )
 
-# ヘルパー関数（変更なし）
-def identify_player_column(salary_df):
-    """プレイヤー名カラムを特定"""
-    possible_names = ['player_name', 'Player', 'name', 'player', 'NAME', 'full_name']
-    
-    for col in possible_names:
-        if col in salary_df.columns:
-            sample_values = salary_df[col].dropna().head()
-            if len(sample_values) > 0:
-                try:
-                    pd.to_numeric(sample_values.iloc[0])
-                    continue
-                except:
-                    return col
-    
-    for col in salary_df.columns:
-        try:
-            pd.to_numeric(salary_df[col].dropna().iloc[0])
-        except:
-            return col
-    
-    return None
-
-def identify_salary_column(salary_df):
-    """サラリーカラムを特定"""
-    possible_names = ['current_salary', 'salary', 'total_salary', '2024-25', '2025', 'amount']
-    
-    for col in possible_names:
-        if col in salary_df.columns:
-            return col
-    
-    numeric_cols = salary_df.select_dtypes(include=[np.number]).columns
-    if len(numeric_cols) > 0:
-        max_avg = 0
-        best_col = None
-        for col in numeric_cols:
-            avg_val = salary_df[col].mean()
-            if avg_val > max_avg:
-                max_avg = avg_val
-                best_col = col
-        return best_col
-    
-    return None
-
-def attempt_enhanced_merge(player_df, salary_df, salary_player_col, salary_col):
-    """強化されたマージ処理"""
-    salary_df_clean = salary_df.copy()
-    player_df_clean = player_df.copy()
-    
-    if salary_player_col in salary_df_clean.columns:
-        salary_df_clean[salary_player_col] = salary_df_clean[salary_player_col].astype(str).str.strip()
-    
-    player_df_clean['Player'] = player_df_clean['Player'].astype(str).str.strip()
-    salary_df_clean[salary_col] = pd.to_numeric(salary_df_clean[salary_col], errors='coerce')
-    
-    merged_df = player_df_clean.merge(
-        salary_df_clean[[salary_player_col, salary_col]], 
-        left_on='Player', 
-        right_on=salary_player_col, 
-        how='inner'
-    )
-    
-    if not merged_df.empty:
-        merged_df['Salary'] = merged_df[salary_col]
-        merged_df = merged_df[merged_df['Salary'].notna() & (merged_df['Salary'] > 0)]
-        return merged_df
-    
-    return pd.DataFrame()
-
 def get_available_metrics(merged_df):
-    """利用可能な効率指標を取得"""
-    available_metrics = []
-    for metric in ['PER', 'VORP', 'WS', 'BPM', 'TS%', 'USG%']:
-        if metric in merged_df.columns:
-            metric_values = pd.to_numeric(merged_df[metric], errors='coerce')
-            if not metric_values.isna().all() and metric_values.sum() != 0:
-                available_metrics.append(metric)
-    return available_metrics
\ No newline at end of file
+    """利用可能な効率指標を取得（効率カラムが計算済みの指標）"""
+    return [metric for metric in EFFICIENCY_METRICS if f'{metric}_per_million' in merged_df.columns]
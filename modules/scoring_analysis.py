@@ -1,7 +1,7 @@
 import streamlit as st
 import plotly.express as px
 from config import PLOTLY_AVAILABLE, safe_plotly_chart, check_required_columns
-from utils.helpers import filter_multi_team_records
+from data.derived import get_derived_table
 
 def create_page(data):
     """得点分析ページ"""
@@ -22,7 +22,7 @@ def create_page(data):
         st.error("Per game データが見つかりません")
         return
     
-    df = filter_multi_team_records(data['per_game'])
+    df = get_derived_table(data, 'filtered_per_game')
     
     if not PLOTLY_AVAILABLE:
         st.error("Plotlyが利用できません。")
@@ -35,22 +35,12 @@ def create_page(data):
             st.subheader("得点ランキング Top 15")
             
             # 同じ選手の重複を除去し、最新チーム（TOTを優先、なければ最後のレコード）を使用
-            df_unique = df.copy()
-            
-            # 各選手について、TOTチームがあれば優先、なければ最後のレコードを使用
-            def get_latest_team_record(group):
-                tot_records = group[group['Team'] == 'TOT']
-                if not tot_records.empty:
-                    return tot_records.iloc[-1]
-                else:
-                    return group.iloc[-1]
-            
-            df_unique = df_unique.groupby('Player').apply(get_latest_team_record).reset_index(drop=True)
+            df_unique = get_derived_table(data, 'latest_team_players')
             
             top_scoring = df_unique.nlargest(15, 'PTS')[['Player', 'Team', 'PTS']]
             
             # プレイヤー名とチーム名を組み合わせて表示
-            top_scoring['player_display'] = top_scoring['Player'] + ' (' + top_scoring['Team'] + ')'
+            top_scoring['player_display'] = top_scoring['Player'] + ' (' + top_scoring['Team'].astype(str) + ')'
             
             fig = px.bar(
                 top_scoring, 
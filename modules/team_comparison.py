@@ -4,7 +4,7 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from config import PLOTLY_AVAILABLE, safe_plotly_chart
-from utils.helpers import filter_multi_team_records
+from data.derived import get_derived_table
 
 def create_page(data):
     """チーム比較ページ"""
@@ -25,7 +25,7 @@ def create_page(data):
         st.error("Per game データが見つかりません")
         return
     
-    df = filter_multi_team_records(data['per_game'])
+    df = get_derived_table(data, 'filtered_per_game')
     
     if 'Team' not in df.columns:
         st.error("チーム情報が見つかりません")
@@ -70,7 +70,7 @@ def create_page(data):
     
     # 比較テーブル
     st.subheader("📊 詳細比較テーブル")
-    comparison_table = selected_df[['Team'] + selected_stats].copy()
+    comparison_table = selected_df[['Team'] + selected_stats]
     st.dataframe(comparison_table, use_container_width=True)
 
 def create_radar_chart(df, selected_df, teams, selected_stats):
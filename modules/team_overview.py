@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from utils.helpers import filter_multi_team_records
+from data.derived import get_derived_table, TEAM_STAT_COLUMNS, ACTIVE_MIN_MINUTES, ACTIVE_MIN_GAMES
 
 def create_page(data):
     """チーム概要ページ"""
@@ -20,36 +20,21 @@ def create_page(data):
         st.error("Per game データが見つかりません")
         return
     
-    player_df = filter_multi_team_records(data['per_game'])
+    # 読み込み時に一度だけ生成された派生テーブルを利用
+    player_df = get_derived_table(data, 'filtered_per_game')
     
     # 選手データからチーム統計を集計
     if 'Team' not in player_df.columns:
         st.error("チーム情報が見つかりません")
         return
     
-    # シンプルなアプローチ：TOTレコードを除外して重複選手は最新のチームを使用
-    # NaN値をクリーンアップ
-    clean_df = player_df.dropna(subset=['Player', 'Team']).copy()
+    # TOTを除外し、重複選手は最新のチーム（最大試合数）を使用
+    current_team_players = get_derived_table(data, 'current_team_players')
     
-    # TOTを除外
-    non_tot_df = clean_df[clean_df['Team'] != 'TOT'].copy()
-    
-    # 各選手について最新のチーム（最大試合数）のレコードを保持
-    if 'G' in non_tot_df.columns:
-        # 試合数が最大のレコードを保持（最新チーム）
-        current_team_players = non_tot_df.loc[non_tot_df.groupby('Player')['G'].idxmax()].copy()
-    else:
-        # 試合数がない場合は最後のレコードを保持
-        current_team_players = non_tot_df.drop_duplicates(subset=['Player'], keep='last')
-    
-    # 実際に出場している選手のみをフィルタ
-    if 'MP' in current_team_players.columns and 'G' in current_team_players.columns:
-        active_players = current_team_players[
-            (current_team_players['MP'].fillna(0) >= 10.0) |  # 平均出場時間10分以上
-            (current_team_players['G'].fillna(0) >= 10)       # 10試合以上出場
-        ].copy()
-    else:
-        active_players = current_team_players.copy()
+    # 実際に出場している選手のみ（平均出場時間10分以上 または 10試合以上出場）
+    # 集計結果は入力データと出場条件が同じ間は再計算しない
+    thresholds = {'min_minutes': ACTIVE_MIN_MINUTES, 'min_games': ACTIVE_MIN_GAMES}
+    active_players = get_derived_table(data, 'active_players', **thresholds)
     
     # チーム単位で統計を集計
     if len(active_players) == 0:
@@ -61,36 +46,13 @@ def create_page(data):
         st.error("試合数データ（G列）が見つかりません")
         return
     
-    # 各選手の総統計値を計算
-    stats_to_process = ['PTS', 'TRB', 'AST', 'STL', 'BLK', 'TOV']
-    available_stats = [stat for stat in stats_to_process if stat in active_players.columns]
+    available_stats = [stat for stat in TEAM_STAT_COLUMNS if stat in active_players.columns]
     
     if not available_stats:
         st.error("集計可能な統計データがありません")
         return
     
-    # 各選手の総統計値を計算（1試合平均 × 試合数）
-    enhanced_players = active_players.copy()
-    for stat in available_stats:
-        enhanced_players[f'{stat}_total'] = enhanced_players[stat] * enhanced_players['G']
-    
-    # チーム単位で集計
-    agg_dict = {'G': 'max'}  # チーム内の最大試合数（シーズン全体の試合数に近い）
-    for stat in available_stats:
-        agg_dict[f'{stat}_total'] = 'sum'  # 総統計値の合計
-    
-    team_stats = enhanced_players.groupby('Team').agg(agg_dict).reset_index()
-    
-    # NaN値を0で埋める
-    team_stats = team_stats.fillna(0)
-    
-    # NBAレギュラーシーズンの試合数（82試合）を使用
-    NBA_REGULAR_SEASON_GAMES = 82
-    
-    # チームの1試合平均を計算（総統計値 ÷ 82試合）
-    for stat in available_stats:
-        if f'{stat}_total' in team_stats.columns:
-            team_stats[f'{stat}_per_game'] = team_stats[f'{stat}_total'] / NBA_REGULAR_SEASON_GAMES
+    team_stats = get_derived_table(data, 'team_stats', **thresholds)
     
     # デバッグ情報（必要に応じて表示）
     if st.checkbox("🔍 デバッグ情報を表示"):
@@ -225,7 +187,7 @@ def create_page(data):
                 display_df = display_df.sort_values('得点/試合', ascending=False)
             
             # 数値は小数点1桁で表示
-            numeric_cols = display_df.select_dtypes(include=['float64', 'int64']).columns
+            numeric_cols = display_df.select_dtypes(include='number').columns
             for col in numeric_cols:
                 display_df[col] = display_df[col].round(1)
             
@@ -0,0 +1,182 @@
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from records_io import read_records_frame, write_records
+
+# 変更履歴は保存先JSONと同じディレクトリに <名前>.changelog.jsonl として追記（data/changelog.py と同じ規約）
+CHANGELOG_SUFFIX = '.changelog.jsonl'
+MAX_CHANGELOG_ENTRIES = 30
+
+# 行を同一視するキーの候補（存在するカラムのみ使用）
+KEY_COLUMN_CANDIDATES = ['Player', 'Team', 'Tm', 'Season']
+
+# 欠損値の比較用ハッシュ
+NULL_HASH = np.uint64(0)
+
+# 読み込み側で除外される2TM、3TM等の複数チーム移籍レコード（utils/helpers.py と同じ規約）
+MULTI_TEAM_PATTERN = r'^\d+TM$'
+TEAM_COLUMNS = ['Team', 'Tm']
+
+def get_changelog_path(filename):
+    """保存先JSONに対応する変更履歴のパス"""
+    return os.path.splitext(filename)[0] + CHANGELOG_SUFFIX
+
+def get_key_columns(columns):
+    """差分のキーとなるカラム（選手単位のテーブルでなければNone）"""
+    if 'Player' not in columns:
+        return None
+    return [col for col in KEY_COLUMN_CANDIDATES if col in columns]
+
+def _hash_column(series):
+    """値の比較用ハッシュ（読み込み時の型推論の違いで同じ値が別物にならないよう正規化）"""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series) or series.isna().all():
+        # 欠損の有無で int / float が変わるため、数値は float64 で比較
+        values = pd.to_numeric(series, errors='coerce').astype('float64')
+    else:
+        values = series.astype(object).astype(str)
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    # 全て欠損の列は数値として推論されるため、欠損はどちらの型でも同じ値にする
+    hashes[series.isna().to_numpy()] = NULL_HASH
+    return hashes
+
+def _hash_rows(df, columns):
+    """各行の指定カラムの値をまとめたハッシュ"""
+    hashes = np.zeros(len(df), dtype='uint64')
+    for col in columns:
+        hashes = hashes * np.uint64(1000003) ^ _hash_column(df[col])
+    return hashes
+
+def _key_signatures(df, key_columns):
+    """(各行のキー番号, キーのハッシュ, キーごとの行の内容と並び順のハッシュ)"""
+    if df.empty:
+        return np.array([], dtype=np.intp), pd.Index([], dtype='uint64'), np.array([], dtype='uint64')
+    codes, key_hashes = pd.factorize(_hash_rows(df, key_columns))
+    # 同じキーの行が複数ある場合は、行の内容と並び順をまとめてキー単位で比較する
+    occurrence = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    positioned = pd.util.hash_pandas_object(
+        pd.DataFrame({'row': _hash_rows(df, list(df.columns)), 'occurrence': occurrence}), index=False
+    ).to_numpy()
+    signatures = np.zeros(len(key_hashes), dtype='uint64')
+    np.add.at(signatures, codes, positioned)
+    signatures ^= np.bincount(codes, minlength=len(key_hashes)).astype('uint64')
+    return codes, pd.Index(key_hashes), signatures
+
+def diff_frames(old_df, new_df, key_columns):
+    """キー単位の差分（内容が変わったキーの新しい行の位置, 消えたキーの旧データ上の先頭行の位置）"""
+    old_codes, old_keys, old_signatures = _key_signatures(old_df, key_columns)
+    new_codes, new_keys, new_signatures = _key_signatures(new_df, key_columns)
+
+    matched = old_keys.get_indexer(new_keys)
+    changed = matched < 0
+    changed[~changed] = old_signatures[matched[~changed]] != new_signatures[~changed]
+    upsert_positions = np.flatnonzero(changed[new_codes])
+
+    deleted = np.flatnonzero(new_keys.get_indexer(old_keys) < 0)
+    # factorize のキー番号は出現順のため、各キーの先頭行の位置はキー番号順に並ぶ
+    _, first_positions = np.unique(old_codes, return_index=True)
+    return upsert_positions, first_positions[deleted]
+
+def _key_values(df, positions, key_columns):
+    """指定した行のキーの値（保存時と同じJSONの値）"""
+    if not len(positions):
+        return []
+    return json.loads(df[key_columns].iloc[positions].to_json(orient='values'))
+
+def _anchor_positions(df, positions):
+    """各行より前にある、読み込み側で除外されない直近の行の位置（なければ-1）"""
+    excluded = np.zeros(len(df), dtype=bool)
+    for col in TEAM_COLUMNS:
+        if col in df.columns:
+            excluded |= df[col].astype(str).str.match(MULTI_TEAM_PATTERN).to_numpy(dtype=bool)
+    kept = np.flatnonzero(~excluded)
+    previous = np.searchsorted(kept, positions) - 1
+    return np.where(previous >= 0, kept[np.maximum(previous, 0)] if len(kept) else -1, -1)
+
+def _file_version(filename):
+    # 読み込み側の共有ストアと同じ (サイズ, 更新時刻) をバージョンとする
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _append_changelog(changelog_path, entry):
+    """変更履歴に1件追記（古いものから捨てて最大件数を保つ）"""
+    lines = []
+    if os.path.exists(changelog_path):
+        with open(changelog_path, 'r', encoding='utf-8') as f:
+            lines = [line for line in f if line.strip()]
+    lines = lines[-(MAX_CHANGELOG_ENTRIES - 1):] + [json.dumps(entry, ensure_ascii=False) + '\n']
+
+    tmp_path = f"{changelog_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    os.replace(tmp_path, changelog_path)
+
+def _remove_changelog(changelog_path):
+    # 差分で追えない書き換えの後は履歴を破棄し、読み込み側に全件読み込みさせる
+    if os.path.exists(changelog_path):
+        os.remove(changelog_path)
+
+def _read_previous(filename):
+    """前回保存したテーブル（ない・読めなければNone）"""
+    if not os.path.exists(filename):
+        return None
+    try:
+        return read_records_frame(filename)
+    except ValueError:
+        return None
+
+def save_table_with_changelog(df, output_filename):
+    """
+    テーブルをJSON（拡張子が .ndjson/.jsonl なら改行区切り）で保存し、前回保存分との行単位の差分を変更履歴に追記
+
+    Returns:
+        dict: {'upserts': 件数, 'deletes': 件数}（差分なしなら両方0で書き込みも行わない）。
+              前回分がない・カラム構成が変わった等で差分を取れない場合はNone
+    """
+    changelog_path = get_changelog_path(output_filename)
+
+    old_df = _read_previous(output_filename)
+    key_columns = get_key_columns(list(df.columns))
+
+    comparable = (
+        old_df is not None and key_columns is not None
+        and (old_df.columns.empty or list(old_df.columns) == list(df.columns))
+    )
+    if not comparable:
+        write_records(df, output_filename)
+        _remove_changelog(changelog_path)
+        return None
+
+    # 保存時と同じ変換を通した値で比較するため、別名で書き出して読み直す（行の辞書のリストは作らない）
+    root, extension = os.path.splitext(output_filename)
+    candidate = f"{root}.{os.getpid()}.new{extension}"
+    try:
+        write_records(df, candidate)
+        upsert_positions, delete_positions = diff_frames(old_df, read_records_frame(candidate), key_columns)
+        if not len(upsert_positions) and not len(delete_positions):
+            return {'upserts': 0, 'deletes': 0}
+
+        base_version = _file_version(output_filename)
+        os.replace(candidate, output_filename)
+    finally:
+        if os.path.exists(candidate):
+            os.remove(candidate)
+
+    # 変更履歴には変わった行だけをJSONの値で残す（読み込み側で新しいキーの行を元の並び順の位置に挿入するため、直前の行のキーも残す）
+    upserts = json.loads(df.iloc[upsert_positions].to_json(orient='records'))
+    # 直前の行が複数チーム行だと読み込み側のデータにないため、さらに前の行を基準にする
+    previous = _anchor_positions(df, upsert_positions)
+    previous_keys = iter(_key_values(df, previous[previous >= 0], key_columns))
+    anchors = [next(previous_keys) if position >= 0 else None for position in previous]
+
+    _append_changelog(changelog_path, {
+        'from': base_version,
+        'to': _file_version(output_filename),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'key': key_columns,
+        'upserts': upserts,
+        'after': anchors,
+        'deletes': _key_values(old_df, delete_positions, key_columns)
+    })
+    return {'upserts': len(upserts), 'deletes': len(delete_positions)}
@@ -0,0 +1,319 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from http_cache import cached_get
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# サーバーに負荷をかけないための既定値（従来の「2秒間隔」に相当）
+DEFAULT_REQUESTS_PER_SECOND = 0.5
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 30
+
+# 再試行するステータス（429: レート制限、5xx: 一時的なサーバーエラー）
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 30
+# 1件あたりの再試行の待機に使える合計秒数（超える場合は待たずに諦める）
+DEFAULT_RETRY_BUDGET = 60
+
+# 連続して失敗したホストへの送信を止める回数と、止めてから試しに1件送るまでの秒数
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """サーキットブレーカーが開いているため送信しなかった"""
+
+def parse_retry_after(value):
+    """Retry-After ヘッダー（秒数またはHTTP日付）を待機秒数に変換（解釈できなければNone）"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class RetryPolicy:
+    """ジッター付き指数バックオフによる再試行の方針（Retry-After があればそれに従う）"""
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX, budget=DEFAULT_RETRY_BUDGET, rng=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = budget
+        self.rng = rng or random.Random()
+
+    def is_retryable(self, error):
+        """接続エラー・タイムアウト・再試行対象のステータスか（ホスト側の障害とみなす）"""
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response is not None and error.response.status_code in RETRY_STATUSES
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+    def next_delay(self, attempt, error, waited):
+        """attempt回目（0始まり）の失敗後に待つ秒数（再試行しない場合はNone、waited: 待機済みの秒数）"""
+        if attempt >= self.max_retries or not self.is_retryable(error):
+            return None
+
+        response = getattr(error, 'response', None)
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+        if retry_after is not None:
+            # 指定時刻に一斉に再送しないよう、少しだけ後ろにずらす
+            delay = retry_after + self.rng.uniform(0, self.backoff_base)
+        else:
+            # フルジッター（0〜上限の一様乱数）
+            delay = self.rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+        if waited + delay > self.budget:
+            return None
+        return delay
+
+class CircuitBreaker:
+    """連続失敗で一定時間送信を止め、その後は1件だけ試して復旧を確認する"""
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        # 同期版はスレッドから呼ばれるためロックで保護
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return 'open'
+        return 'half_open'
+
+    def allow(self):
+        """送信してよいか（half_open では試しの1件のみ許可）"""
+        return self.acquire() is not None
+
+    def acquire(self):
+        """送信の許可を取得（拒否ならNone、half_open の試しの1件なら 'trial'、通常は 'closed'）"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return 'closed'
+            if state == 'open' or self._trial_running:
+                return None
+            self._trial_running = True
+            return 'trial'
+
+    def release_trial(self):
+        """成否を記録せずに試しの1件を終える（次の送信で改めて試す）"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            # 試しの1件が失敗した場合も開き直す
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class HostCircuitBreakers:
+    """ホストごとのサーキットブレーカー"""
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+def _check_circuit(breaker, url):
+    """送信の許可を取得（拒否なら CircuitOpenError）"""
+    permit = breaker.acquire()
+    if permit is None:
+        raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}, skipping {url}")
+    return permit
+
+def _failure_delay(policy, breaker, attempt, error, waited):
+    """失敗をブレーカーに記録し、再試行までの待機秒数を返す（再試行しなければNone）"""
+    if policy.is_retryable(error):
+        breaker.record_failure()
+    else:
+        # 404等はホストが応答しているため障害に数えない
+        breaker.record_success()
+    return policy.next_delay(attempt, error, waited)
+
+def call_with_retry(func, url, retry_policy=None, breakers=None, stop_event=None):
+    """
+    url への取得処理 func() を再試行・サーキットブレーカー付きで実行（同期版）
+
+    Args:
+        func: 引数なしで呼び出す取得処理（失敗時は requests の例外を送出）
+        url (str): ブレーカーのホスト判定とエラーメッセージに使うURL
+        retry_policy (RetryPolicy): 省略時は既定の方針
+        breakers (HostCircuitBreakers): 省略時はブレーカーなし
+        stop_event (threading.Event): セットされると待機中の再試行を打ち切る
+    """
+    policy = retry_policy or RetryPolicy()
+    breaker = breakers.for_url(url) if breakers is not None else CircuitBreaker()
+    waited = 0.0
+    attempt = 0
+    while True:
+        permit = _check_circuit(breaker, url)
+        recorded = False
+        try:
+            result = func()
+            breaker.record_success()
+            recorded = True
+            return result
+        except requests.exceptions.RequestException as e:
+            delay = _failure_delay(policy, breaker, attempt, e, waited)
+            recorded = True
+            if delay is None:
+                raise
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    raise
+            else:
+                time.sleep(delay)
+            waited += delay
+            attempt += 1
+        finally:
+            # 成否を記録せずに抜けた場合（キャッシュ保存時の OSError 等）も試しの1件を解放
+            if not recorded and permit == 'trial':
+                breaker.release_trial()
+
+class TokenBucket:
+    """トークンバケット方式のレート制限（rate: 1秒あたりの補充数、capacity: 最大連続リクエスト数）"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """トークンを1つ取得（不足していれば補充まで待機）"""
+        # ロックは実行中のイベントループ上で作成
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+class AsyncFetcher:
+    """コネクションプールを共有し、同時接続数とリクエストレートを制限して並行取得（失敗時は再試行）"""
+
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=1,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, headers=None, timeout=DEFAULT_TIMEOUT,
+                 http_cache=None, retry_policy=None, breakers=None):
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = breakers or HostCircuitBreakers()
+        # HTTPCache を渡すと fetch_page が条件付きリクエストになる
+        self.http_cache = http_cache
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = None
+
+        # 同一ホストへの接続を使い回す
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+
+    async def _run_limited(self, func, *args, **kwargs):
+        """同時接続数とレート制限の下でブロッキング処理をスレッド実行"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            await self.rate_limiter.acquire()
+            # requests はブロッキングのためスレッドで実行
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def _run_with_retry(self, url, func, *args, **kwargs):
+        """再試行・サーキットブレーカー付きで実行（待機中は接続枠を占有せず、再送もレート制限に従う）"""
+        breaker = self.breakers.for_url(url)
+        waited = 0.0
+        attempt = 0
+        while True:
+            permit = _check_circuit(breaker, url)
+            recorded = False
+            try:
+                result = await self._run_limited(func, *args, **kwargs)
+                breaker.record_success()
+                recorded = True
+                return result
+            except requests.exceptions.RequestException as e:
+                delay = _failure_delay(self.retry_policy, breaker, attempt, e, waited)
+                recorded = True
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                waited += delay
+                attempt += 1
+            finally:
+                # 成否を記録せずに抜けた場合（キャッシュ保存時の OSError・キャンセル等）も試しの1件を解放
+                if not recorded and permit == 'trial':
+                    breaker.release_trial()
+
+    def _get(self, url, headers=None):
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    async def fetch(self, url, headers=None):
+        """1件取得（HTTPエラーは requests.exceptions.HTTPError を送出）"""
+        return await self._run_with_retry(url, self._get, url, headers)
+
+    async def fetch_page(self, url):
+        """1件取得し CachedPage を返す（未更新なら not_modified=True で保存済みの本文）"""
+        return await self._run_with_retry(url, cached_get, self.session, url, self.http_cache, timeout=self.timeout)
+
+    async def fetch_all(self, urls):
+        """複数URLを並行取得（結果はURLの順、失敗した要素は例外オブジェクト）"""
+        return await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+
+# 取得したページ本文と検証子（ETag / Last-Modified）の保存先
+DEFAULT_HTTP_CACHE_DIR = os.path.join('nba_data', '.cache', 'http')
+
+class CachedPage:
+    """取得結果（not_modified が True の場合は保存済みの本文）"""
+
+    def __init__(self, url, content, encoding=None, not_modified=False):
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+        self.not_modified = not_modified
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+class HTTPCache:
+    """ETag / Last-Modified 付きでレスポンス本文を保存するディスクキャッシュ"""
+
+    def __init__(self, cache_dir=DEFAULT_HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.body', base + '.json'
+
+    def read_meta(self, url):
+        """保存済みのメタデータ（なければNone）"""
+        body_path, meta_path = self._paths(url)
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url):
+        """前回の検証子から If-None-Match / If-Modified-Since ヘッダーを作成"""
+        meta = self.read_meta(url) or {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def load(self, url):
+        """保存済みのページを取得（なければNone）"""
+        meta = self.read_meta(url)
+        if meta is None:
+            return None
+        body_path, _ = self._paths(url)
+        try:
+            with open(body_path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        return CachedPage(url, content, meta.get('encoding'), not_modified=True)
+
+    def store(self, url, response):
+        """検証子付きのレスポンスを保存（検証子がなければ保存しない）"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        body_path, meta_path = self._paths(url)
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding
+        }
+
+        # 本文 → メタデータの順に置き換え、メタデータがあれば本文は揃っている状態を保つ
+        for path, data, mode in [(body_path, response.content, 'wb'), (meta_path, json.dumps(meta), 'w')]:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+def cached_get(session, url, http_cache=None, headers=None, **kwargs):
+    """条件付きGET（304なら保存済みの本文を返し、200なら保存）"""
+    request_headers = dict(headers or {})
+    if http_cache is not None:
+        request_headers.update(http_cache.conditional_headers(url))
+
+    response = session.get(url, headers=request_headers, **kwargs)
+
+    if response.status_code == 304 and http_cache is not None:
+        page = http_cache.load(url)
+        if page is not None:
+            return page
+        # 保存済みの本文が失われている場合は条件なしで取得し直す
+        response = session.get(url, headers=headers, **kwargs)
+
+    response.raise_for_status()
+    if http_cache is not None:
+        http_cache.store(url, response)
+
+    return CachedPage(url, response.content, response.encoding)
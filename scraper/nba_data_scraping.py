@@ -1,123 +1,210 @@
+import argparse
+import asyncio
+from io import StringIO
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
 import os
+from fetcher import AsyncFetcher, DEFAULT_HEADERS, DEFAULT_TIMEOUT, call_with_retry
+from http_cache import HTTPCache, cached_get
+from table_extractor import LXML_AVAILABLE, extract_stats_table
+from changelog import save_table_with_changelog
+from records_io import OUTPUT_FORMATS, read_records_frame
 
-def scrape_basketball_reference_table(url, output_filename):
+BASKETBALL_REFERENCE_BASE_URL = 'https://www.basketball-reference.com'
+
+# 取得対象のテーブル（URLのページ名, データセット名）
+BASKETBALL_REFERENCE_TABLES = [
+    ('advanced', 'advanced'),
+    ('per_game', 'per_game'),
+    ('play-by-play', 'play_by_play')
+]
+
+DEFAULT_SEASON = 2025
+
+def season_partition_name(season):
+    """シーズンのパーティションディレクトリ名（data/seasons.py の読み込み側と同じ規約）"""
+    return f'season={int(season)}'
+
+def parse_basketball_reference_table(html):
+    """Basketball ReferenceのページHTMLからメインの統計テーブルを取得（見つからなければNone）"""
+    # lxmlがあれば1回のパースで型付きのテーブルを抽出（コメントアウトされたテーブルにも対応）
+    if LXML_AVAILABLE:
+        return extract_stats_table(html)
+    return parse_table_with_beautifulsoup(html)
+
+def parse_table_with_beautifulsoup(html):
+    """BeautifulSoupでテーブルを探し、pandas.read_htmlで読み取る（lxmlがない環境用）"""
+    # HTMLをパース
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # メインの統計テーブルを探す（通常はid="stats"）
+    table = soup.find('table', {'id': 'stats'})
+    
+    if not table:
+        # 他の可能なテーブルIDも試す
+        possible_ids = ['per_game-team', 'advanced-team', 'play-by-play-team', 'totals-team']
+        for table_id in possible_ids:
+            table = soup.find('table', {'id': table_id})
+            if table:
+                break
+    
+    if not table:
+        # クラス名でも探してみる
+        table = soup.find('table', class_='stats_table')
+    
+    if not table:
+        return None
+    
+    # pandasでテーブルを読み取り
+    df = pd.read_html(StringIO(str(table)))[0]
+    
+    # マルチレベルカラムの処理
+    if isinstance(df.columns, pd.MultiIndex):
+        # マルチレベルカラムを結合
+        df.columns = [' '.join(col).strip() if col[1] != '' else col[0] for col in df.columns.values]
+    
+    # 不要な行を削除（ヘッダーが重複している行など）
+    df = df[df.iloc[:, 0] != df.columns[0]]  # ヘッダー行の重複を削除
+    
+    # 空の行を削除
+    df = df.dropna(how='all')
+    
+    # インデックスをリセット
+    return df.reset_index(drop=True)
+
+def load_saved_table(output_filename):
+    """前回保存したJSON（または改行区切りJSON）を読み込み"""
+    return read_records_frame(output_filename)
+
+def scrape_basketball_reference_table(url, output_filename, http_cache=None):
     """
     Basketball Referenceのページからテーブルを取得してJSONとして保存
     
     Args:
         url (str): スクレイピング対象のURL
         output_filename (str): 出力ファイル名
+        http_cache (HTTPCache): 指定時は条件付きリクエストを行い、未更新なら前回のJSONを再利用
     """
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
         print(f"Fetching data from: {url}")
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        # HTMLをパース
-        soup = BeautifulSoup(response.content, 'html.parser')
+        # 429・5xx・接続エラーはバックオフを挟んで再試行
+        # タイムアウトを指定しないと応答が止まったまま待ち続け、再試行も行われない
+        page = call_with_retry(
+            lambda: cached_get(requests, url, http_cache, headers=DEFAULT_HEADERS, timeout=DEFAULT_TIMEOUT), url
+        )
         
-        # メインの統計テーブルを探す（通常はid="stats"）
-        table = soup.find('table', {'id': 'stats'})
+        if page.not_modified and os.path.exists(output_filename):
+            print(f"Not modified, reusing {output_filename}")
+            return load_saved_table(output_filename)
         
-        if not table:
-            # 他の可能なテーブルIDも試す
-            possible_ids = ['per_game-team', 'advanced-team', 'play-by-play-team', 'totals-team']
-            for table_id in possible_ids:
-                table = soup.find('table', {'id': table_id})
-                if table:
-                    break
+        return process_table_response(url, page.content, output_filename)
         
-        if not table:
-            # クラス名でも探してみる
-            table = soup.find('table', class_='stats_table')
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+def process_table_response(url, html, output_filename):
+    """取得済みHTMLからテーブルを抽出して保存"""
+    try:
+        df = parse_basketball_reference_table(html)
         
-        if not table:
+        if df is None:
             print(f"Warning: No table found for {url}")
             return None
         
-        # pandasでテーブルを読み取り
-        df = pd.read_html(str(table))[0]
-        
-        # マルチレベルカラムの処理
-        if isinstance(df.columns, pd.MultiIndex):
-            # マルチレベルカラムを結合
-            df.columns = [' '.join(col).strip() if col[1] != '' else col[0] for col in df.columns.values]
-        
-        # 不要な行を削除（ヘッダーが重複している行など）
-        df = df[df.iloc[:, 0] != df.columns[0]]  # ヘッダー行の重複を削除
-        
-        # 空の行を削除
-        df = df.dropna(how='all')
-        
-        # インデックスをリセット
-        df = df.reset_index(drop=True)
+        # 前回保存分との差分を変更履歴に残す（アプリ側は差分だけを適用する）
+        changes = save_table_with_changelog(df, output_filename)
         
-        # JSONに変換
-        json_data = df.to_json(orient='records', indent=2)
-        
-        # ファイルに保存
-        with open(output_filename, 'w', encoding='utf-8') as f:
-            f.write(json_data)
-        
-        print(f"Successfully saved {len(df)} records to {output_filename}")
+        if changes is None:
+            print(f"Successfully saved {len(df)} records to {output_filename}")
+        elif changes['upserts'] or changes['deletes']:
+            print(f"Updated {output_filename}: {changes['upserts']} changed, {changes['deletes']} removed")
+        else:
+            print(f"No changes in {output_filename}")
         return df
         
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        return None
     except Exception as e:
         print(f"Error processing {url}: {e}")
         return None
 
-def main():
-    """メイン処理"""
-    
-    # スクレイピング対象のURL
-    urls = [
-        {
-            'url': 'https://www.basketball-reference.com/leagues/NBA_2025_advanced.html',
-            'filename': 'nba_2025_advanced_stats.json'
-        },
-        {
-            'url': 'https://www.basketball-reference.com/leagues/NBA_2025_per_game.html', 
-            'filename': 'nba_2025_per_game_stats.json'
-        },
+def build_scraping_targets(base_url=BASKETBALL_REFERENCE_BASE_URL, seasons=DEFAULT_SEASON, output_format='json'):
+    """シーズン（単一または複数）の取得対象URLと出力ファイル名（season=YYYY/<データセット>.json）の一覧
+
+    output_format='ndjson' の場合は1行1レコードの season=YYYY/<データセット>.ndjson に出力
+    """
+    if isinstance(seasons, int):
+        seasons = [seasons]
+    extension = OUTPUT_FORMATS[output_format]
+    return [
         {
-            'url': 'https://www.basketball-reference.com/leagues/NBA_2025_play-by-play.html',
-            'filename': 'nba_2025_play_by_play_stats.json'
+            'url': f'{base_url}/leagues/NBA_{season}_{page}.html',
+            'filename': os.path.join(season_partition_name(season), f'{dataset}{extension}')
         }
+        for season in seasons
+        for page, dataset in BASKETBALL_REFERENCE_TABLES
     ]
+
+async def scrape_basketball_reference_tables(targets, output_dir, fetcher):
+    """全テーブルを並行に取得して保存（間隔は fetcher のレート制限に従う）"""
     
-    # 出力ディレクトリの作成
-    output_dir = 'nba_data'
-    os.makedirs(output_dir, exist_ok=True)
-    
-    results = {}
-    
-    for url_info in urls:
+    async def scrape_one(url_info):
         url = url_info['url']
         filename = os.path.join(output_dir, url_info['filename'])
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
         
-        # データを取得
-        df = scrape_basketball_reference_table(url, filename)
+        try:
+            print(f"Fetching data from: {url}")
+            page = await fetcher.fetch_page(url)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
         
-        if df is not None:
-            results[url_info['filename']] = {
-                'records': len(df),
-                'columns': list(df.columns)
-            }
+        # 未更新ならパースせず前回のJSONを再利用
+        if page.not_modified and os.path.exists(filename):
+            print(f"Not modified, reusing {filename}")
+            return await asyncio.to_thread(load_saved_table, filename)
         
-        # リクエスト間隔を空ける（サーバーに負荷をかけないため）
-        time.sleep(2)
+        # パース中も他のリクエストを進められるようスレッドで実行
+        return await asyncio.to_thread(process_table_response, url, page.content, filename)
+    
+    frames = await asyncio.gather(*(scrape_one(url_info) for url_info in targets))
+    
+    return {
+        url_info['filename']: {
+            'records': len(df),
+            'columns': list(df.columns)
+        }
+        for url_info, df in zip(targets, frames) if df is not None
+    }
+
+def parse_seasons(value):
+    """「2025」「2020-2025」「2019,2021」形式のシーズン指定をリストに変換"""
+    seasons = []
+    for part in value.split(','):
+        if '-' in part:
+            start, end = (int(year) for year in part.split('-', 1))
+            seasons.extend(range(start, end + 1))
+        else:
+            seasons.append(int(part))
+    return sorted(set(seasons))
+
+def main(base_url=BASKETBALL_REFERENCE_BASE_URL, seasons=DEFAULT_SEASON, output_dir='nba_data', use_http_cache=True,
+         output_format='json'):
+    """メイン処理（seasons: シーズンまたはシーズンのリスト・range、output_format: 'json' または 'ndjson'）"""
+    
+    # スクレイピング対象のURL（シーズン×テーブルごとに1パーティション）
+    urls = build_scraping_targets(base_url, seasons, output_format)
+    
+    # 出力ディレクトリの作成
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # 前回取得時の ETag / Last-Modified で条件付きリクエストを行う
+    http_cache = HTTPCache(os.path.join(output_dir, '.cache', 'http')) if use_http_cache else None
+    
+    # リクエスト間隔はトークンバケットで制御（サーバーに負荷をかけないため）
+    with AsyncFetcher(http_cache=http_cache) as fetcher:
+        results = asyncio.run(scrape_basketball_reference_tables(urls, output_dir, fetcher))
     
     # 結果サマリーを出力
     print("\n=== Scraping Results ===")
@@ -125,6 +212,17 @@ def main():
         print(f"{filename}: {info['records']} records, {len(info['columns'])} columns")
         print(f"  Columns: {', '.join(info['columns'][:5])}..." if len(info['columns']) > 5 else f"  Columns: {', '.join(info['columns'])}")
         print()
+    
+    return results
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Basketball-Referenceのシーズン別スタッツを取得')
+    parser.add_argument('--seasons', type=parse_seasons, default=[DEFAULT_SEASON],
+                        help='取得するシーズン（例: 2025, 2020-2025, 2019,2021）')
+    parser.add_argument('--output-dir', default='nba_data')
+    parser.add_argument('--no-http-cache', action='store_true', help='条件付きリクエストを行わない')
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default='json',
+                        help='出力形式（ndjson は1行1レコードで逐次書き込み）')
+    args = parser.parse_args()
+    main(seasons=args.seasons, output_dir=args.output_dir, use_http_cache=not args.no_http_cache,
+         output_format=args.format)
@@ -1,14 +1,38 @@
+import argparse
 import requests
 from bs4 import BeautifulSoup
+import numpy as np
 import pandas as pd
 import json
 import time
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from io import StringIO
 from typing import Optional, List, Dict
-import re
+from http_cache import HTTPCache, CachedPage, cached_get
+from fetcher import HostCircuitBreakers, RetryPolicy, call_with_retry
+from salary_extractor import clean_salary_column, parse_hoopshype_salaries
+from records_io import (
+    OUTPUT_FORMATS, is_ndjson, read_records_frame, remove_other_formats, with_output_format, write_records
+)
+
+PLAYER_SALARIES_FILENAME = 'nba_player_salaries_2025.json'
+TEAM_SALARIES_FILENAME = 'nba_team_salaries_2025.json'
+
+# ソースごとの取得先（検証時はローカルのフィクスチャサーバーに差し替える）
+SALARY_SOURCE_URLS = {
+    'hoopshype': 'https://hoopshype.com/salaries/players/',
+    'basketball_reference': 'https://www.basketball-reference.com/contracts/players.html',
+    'espn': 'https://www.espn.com/nba/salaries'
+}
+
+# 全ソースの取得を待つ上限（秒）
+SALARY_SOURCES_TIMEOUT = 120
 
 class NBAPlayerSalaryScraper:
-    def __init__(self):
+    def __init__(self, output_dir: str = 'nba_data', use_http_cache: bool = True, output_format: str = 'json',
+                 source_urls: Optional[Dict[str, str]] = None, retry_policy: Optional[RetryPolicy] = None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -18,84 +42,79 @@ class NBAPlayerSalaryScraper:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
-    
-    def clean_salary_text(self, salary_text: str) -> int:
-        """サラリーテキストを数値に変換"""
-        if not salary_text or salary_text in ['-', '--', 'N/A', '']:
-            return 0
         
-        # 記号と文字を除去
-        cleaned = re.sub(r'[^\d]', '', salary_text)
+        # 前回取得時の ETag / Last-Modified で条件付きリクエストを行う
+        self.output_dir = output_dir
+        self.http_cache = HTTPCache(os.path.join(output_dir, '.cache', 'http')) if use_http_cache else None
+        # 前回から更新がなく、保存済みデータを再利用したソース
+        self.unchanged_sources = set()
+        # 'ndjson' の場合、選手・チーム別サラリーを1行1レコードで逐次書き込み
+        self.output_format = output_format
+        # 直近の移籍選手処理の集計（process_traded_players が設定）
+        self.traded_players_summary = None
+        
+        self.source_urls = {**SALARY_SOURCE_URLS, **(source_urls or {})}
+        # 429・5xx・接続エラーは再試行し、落ちているホストへの送信はブレーカーで止める
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = HostCircuitBreakers()
+        # 他のソースで取得できた時点でセットし、待機中の再試行を打ち切る
+        self.stop_event = threading.Event()
+    
+    def fetch_page(self, url: str) -> CachedPage:
+        """ページを取得（未更新なら保存済みの本文を not_modified=True で返す）"""
+        return call_with_retry(lambda: cached_get(self.session, url, self.http_cache, timeout=30),
+                               url, self.retry_policy, self.breakers, self.stop_event)
+    
+    def fetch(self, url: str) -> requests.Response:
+        """条件付きリクエストなしでページを取得（HTTPエラーは例外）"""
+        def get():
+            response = self.session.get(url, timeout=30)
+            response.raise_for_status()
+            return response
+        return call_with_retry(get, url, self.retry_policy, self.breakers, self.stop_event)
+    
+    def load_saved_salaries(self, source: str) -> Optional[pd.DataFrame]:
+        """前回保存したJSONから指定ソースのレコードを読み込み（なければNone）"""
+        player_file = os.path.join(self.output_dir, with_output_format(PLAYER_SALARIES_FILENAME, self.output_format))
+        if not os.path.exists(player_file):
+            return None
         
         try:
-            return int(cleaned) if cleaned else 0
-        except ValueError:
-            return 0
+            saved_df = read_records_frame(player_file)
+        except (OSError, ValueError):
+            return None
+        
+        if saved_df.empty or 'source' not in saved_df.columns:
+            return None
+        saved_df = saved_df[saved_df['source'] == source].drop(columns=['final_rank'], errors='ignore')
+        if saved_df.empty:
+            return None
+        
+        self.unchanged_sources.add(source)
+        return saved_df.reset_index(drop=True)
     
     def scrape_hoopshype(self) -> Optional[pd.DataFrame]:
         """HoopsHypeからサラリーデータを取得"""
         print("🏀 Scraping HoopsHype...")
         
         try:
-            url = 'https://hoopshype.com/salaries/players/'
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            players = []
-            
-            # テーブル行を取得
-            rows = soup.select('.hh-salaries-ranking-table tbody tr')
-            if not rows:
-                rows = soup.select('table tbody tr')
+            url = self.source_urls['hoopshype']
+            page = self.fetch_page(url)
             
-            print(f"Found {len(rows)} rows")
+            # 前回から更新がなければパースせずに保存済みデータを再利用
+            if page.not_modified:
+                saved_df = self.load_saved_salaries('hoopshype')
+                if saved_df is not None:
+                    print(f"♻️ HoopsHype: not modified, reusing {len(saved_df)} saved players")
+                    return saved_df
             
-            for i, row in enumerate(rows):
-                try:
-                    cells = row.find_all('td')
-                    if len(cells) < 3:
-                        continue
-                    
-                    # プレイヤー名
-                    name_element = cells[0].find('a') or cells[0]
-                    name = name_element.get_text(strip=True)
-                    
-                    if not name or name.lower() in ['player', 'name']:
-                        continue
-                    
-                    # チーム
-                    team = cells[1].get_text(strip=True)
-                    
-                    # 現在のサラリー
-                    current_salary = self.clean_salary_text(cells[2].get_text(strip=True))
-                    
-                    # 将来のサラリー
-                    future_salaries = {}
-                    for j, cell in enumerate(cells[3:8]):  # 最大5年分
-                        salary_value = self.clean_salary_text(cell.get_text(strip=True))
-                        if salary_value > 0:
-                            future_salaries[f'salary_year_{j+2}'] = salary_value
-                    
-                    player_data = {
-                        'player_name': name,
-                        'team': team,
-                        'current_salary': current_salary,
-                        'rank': i + 1,
-                        'source': 'hoopshype'
-                    }
-                    player_data.update(future_salaries)
-                    
-                    players.append(player_data)
-                    
-                    if (i + 1) % 50 == 0:
-                        print(f"Processed {i + 1} players...")
-                
-                except Exception as e:
-                    continue
+            # テーブルを1回のパースで列ごとに取り出し、サラリーは列単位で数値化
+            df, row_count = parse_hoopshype_salaries(page.text)
+            print(f"Found {row_count} rows")
             
-            print(f"✅ HoopsHype: {len(players)} players extracted")
-            return pd.DataFrame(players) if players else None
+            player_count = 0 if df is None else len(df)
+            print(f"✅ HoopsHype: {player_count} players extracted")
+            return df
             
         except Exception as e:
             print(f"❌ HoopsHype error: {e}")
@@ -106,12 +125,18 @@ class NBAPlayerSalaryScraper:
         print("🏀 Scraping Basketball-Reference...")
         
         try:
-            url = 'https://www.basketball-reference.com/contracts/players.html'
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            url = self.source_urls['basketball_reference']
+            page = self.fetch_page(url)
+            
+            # 前回から更新がなければパースせずに保存済みデータを再利用
+            if page.not_modified:
+                saved_df = self.load_saved_salaries('basketball_reference')
+                if saved_df is not None:
+                    print(f"♻️ Basketball-Reference: not modified, reusing {len(saved_df)} saved players")
+                    return saved_df
             
             # pandasのread_htmlを使用
-            tables = pd.read_html(response.text)
+            tables = pd.read_html(StringIO(page.text))
             
             for table in tables:
                 if len(table) > 50 and any('salary' in str(col).lower() for col in table.columns):
@@ -131,30 +156,19 @@ class NBAPlayerSalaryScraper:
                             salary_cols.append(col)
                     
                     if player_col and salary_cols:
-                        players = []
-                        for i, row in df.iterrows():
-                            try:
-                                name = str(row[player_col]).strip()
-                                if not name or name == 'nan':
-                                    continue
-                                
-                                current_salary = 0
-                                if salary_cols:
-                                    salary_text = str(row[salary_cols[0]])
-                                    current_salary = self.clean_salary_text(salary_text)
-                                
-                                players.append({
-                                    'player_name': name,
-                                    'team': '',  # Basketball-Referenceはチーム情報が別
-                                    'current_salary': current_salary,
-                                    'rank': i + 1,
-                                    'source': 'basketball_reference'
-                                })
-                            except:
-                                continue
+                        names = df[player_col].astype(str).str.strip()
+                        valid = ((names != '') & (names != 'nan')).to_numpy()
+                        
+                        players = pd.DataFrame({
+                            'player_name': names[valid].to_numpy(),
+                            'team': '',  # Basketball-Referenceはチーム情報が別
+                            'current_salary': clean_salary_column(df[salary_cols[0]].astype(str)[valid]).to_numpy(),
+                            'rank': np.flatnonzero(valid) + 1,
+                            'source': 'basketball_reference'
+                        })
                         
                         print(f"✅ Basketball-Reference: {len(players)} players extracted")
-                        return pd.DataFrame(players)
+                        return players
             
             return None
             
@@ -169,8 +183,8 @@ class NBAPlayerSalaryScraper:
         try:
             # ESPNは動的コンテンツが多いため、静的スクレイピングは困難
             # ここではデモ用の基本的な試行のみ
-            url = 'https://www.espn.com/nba/salaries'
-            response = self.session.get(url, timeout=30)
+            url = self.source_urls['espn']
+            response = self.fetch(url)
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
@@ -192,71 +206,77 @@ class NBAPlayerSalaryScraper:
         
         print("🔄 Processing traded players...")
         
-        # 各選手について重複をチェック
-        processed_players = []
-        player_groups = df.groupby('player_name')
-        
-        for player_name, group in player_groups:
-            if len(group) == 1:
-                # 重複なし：そのまま追加
-                processed_players.append(group.iloc[0])
-            else:
-                # 重複あり：最新チームを決定
-                print(f"   Found traded player: {player_name} ({len(group)} teams)")
-                
-                # TOTチームがある場合、TOT以外の最新チーム（最高サラリー）を選択
-                non_tot_teams = group[group['team'] != 'TOT']
-                if not non_tot_teams.empty:
-                    # TOT以外で最高サラリーのレコード（最新契約）
-                    latest_record = non_tot_teams.loc[non_tot_teams['current_salary'].idxmax()]
-                    print(f"     → Selected current team: {latest_record['team']} (${latest_record['current_salary']:,})")
-                else:
-                    # TOTのみの場合はそれを使用
-                    latest_record = group.iloc[0]
-                    print(f"     → Only TOT available, keeping: {latest_record['team']}")
-                
-                processed_players.append(latest_record)
-        
-        # 新しいDataFrameを作成
-        result_df = pd.DataFrame(processed_players)
-        
-        original_count = len(df)
-        final_count = len(result_df)
-        removed_count = original_count - final_count
+        # 選手名 → TOT以外を優先 → TOT以外は最高サラリー（最新契約）→ 元の順 で並べ、選手ごとに先頭を残す
+        # （TOTのみの選手は最初の行、同額なら先に出てきた行）
+        player_codes, _ = pd.factorize(df['player_name'], sort=True)
+        is_tot = (df['team'] == 'TOT').to_numpy()
+        salary = pd.to_numeric(df['current_salary'], errors='coerce').to_numpy(dtype=float)
+        salary_key = np.where(is_tot, 0.0, -salary)
+        order = np.lexsort((np.arange(len(df)), salary_key, is_tot, player_codes))
+        # 選手名が欠損した行は従来どおり除外
+        order = order[player_codes[order] >= 0]
+        
+        # 選手名順に並んでいるため、drop_duplicates と同じ結果を選手コードの切り替わりで求める
+        sorted_codes = player_codes[order]
+        first_rows = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]] if len(order) else np.zeros(0, dtype=bool)
+        result_df = df.take(order[first_rows])
+        
+        # 選手ごとの出力の代わりに集計結果を残す
+        record_counts = np.bincount(sorted_codes)[sorted_codes[first_rows]] if len(order) else np.zeros(0, dtype=int)
+        traded = result_df[record_counts > 1]
+        self.traded_players_summary = {
+            'original_records': len(df),
+            'final_records': len(result_df),
+            'removed_duplicates': len(df) - len(result_df),
+            'traded_players': len(traded),
+            'tot_only_players': int((traded['team'] == 'TOT').sum()),
+            'selected': pd.DataFrame({
+                'player_name': traded['player_name'].to_numpy(),
+                'records': record_counts[record_counts > 1],
+                'team': traded['team'].to_numpy(),
+                'current_salary': traded['current_salary'].to_numpy()
+            })
+        }
         
+        summary = self.traded_players_summary
         print(f"✅ Traded player processing complete:")
-        print(f"   Original records: {original_count}")
-        print(f"   Final records: {final_count}")
-        print(f"   Removed duplicates: {removed_count}")
+        print(f"   Original records: {summary['original_records']}")
+        print(f"   Final records: {summary['final_records']}")
+        print(f"   Removed duplicates: {summary['removed_duplicates']}")
+        print(f"   Traded players: {summary['traded_players']} ({summary['tot_only_players']} with TOT only)")
         
         return result_df
 
-    def get_all_salaries(self) -> Optional[pd.DataFrame]:
-        """複数のソースからサラリーデータを取得"""
+    def race_sources(self, sources, timeout: float = SALARY_SOURCES_TIMEOUT) -> Optional[pd.DataFrame]:
+        """ソースを並行に取得し、最初にデータを返したソースの結果を使用（残りは打ち切り）"""
+        self.stop_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=len(sources))
+        futures = [executor.submit(source) for source in sources]
+        try:
+            # 各ソースは失敗時にNoneを返す
+            for future in as_completed(futures, timeout=timeout):
+                df = future.result()
+                if df is not None and not df.empty:
+                    return df
+        except FuturesTimeoutError:
+            print(f"⏱️ No salary source returned data within {timeout}s")
+        finally:
+            # 待機中の再試行を止め、終わっていない取得は待たない
+            self.stop_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        return None
+    
+    def get_all_salaries(self, timeout: float = SALARY_SOURCES_TIMEOUT) -> Optional[pd.DataFrame]:
+        """複数のソースからサラリーデータを取得（並行に取得し、最初に取得できたソースを使用）"""
         print("=== NBA Player Salary Collection Started ===\n")
         
+        # ソースごとにホストが異なるため、間隔を空けずに同時に取得
         all_dataframes = []
-        
-        # 1. HoopsHype (メインソース)
-        hoopshype_df = self.scrape_hoopshype()
-        if hoopshype_df is not None:
-            all_dataframes.append(hoopshype_df)
-        
-        time.sleep(2)  # レート制限対策
-        
-        # 2. Basketball-Reference (バックアップ)
-        if not all_dataframes:  # HoopsHypeが失敗した場合のみ
-            bref_df = self.scrape_basketball_reference()
-            if bref_df is not None:
-                all_dataframes.append(bref_df)
-        
-        time.sleep(2)
-        
-        # 3. ESPN (最後の手段)
-        if not all_dataframes:
-            espn_df = self.scrape_espn()
-            if espn_df is not None:
-                all_dataframes.append(espn_df)
+        source_df = self.race_sources(
+            [self.scrape_hoopshype, self.scrape_basketball_reference, self.scrape_espn], timeout
+        )
+        if source_df is not None:
+            all_dataframes.append(source_df)
         
         # データフレームを結合
         if all_dataframes:
@@ -274,6 +294,16 @@ class NBAPlayerSalaryScraper:
         
         return None
     
+    def write_records_file(self, df: pd.DataFrame, filepath: str) -> None:
+        """レコードを保存（.ndjson は辞書のリストを作らずチャンクごとに書き込み、別形式の同名ファイルは削除）"""
+        if is_ndjson(filepath):
+            write_records(df, filepath)
+            return
+        
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(df.to_dict('records'), f, indent=2, ensure_ascii=False)
+        remove_other_formats(filepath)
+    
     def save_to_json(self, df: pd.DataFrame, output_dir: str = 'nba_data') -> Dict[str, str]:
         """データをJSONファイルに保存"""
         os.makedirs(output_dir, exist_ok=True)
@@ -281,9 +311,8 @@ class NBAPlayerSalaryScraper:
         files_created = {}
         
         # 1. 全プレイヤーサラリー
-        player_file = os.path.join(output_dir, 'nba_player_salaries_2025.json')
-        with open(player_file, 'w', encoding='utf-8') as f:
-            json.dump(df.to_dict('records'), f, indent=2, ensure_ascii=False)
+        player_file = os.path.join(output_dir, with_output_format(PLAYER_SALARIES_FILENAME, self.output_format))
+        self.write_records_file(df, player_file)
         files_created['players'] = player_file
         
         # 2. チーム別集計（チーム情報がある場合）
@@ -297,9 +326,8 @@ class NBAPlayerSalaryScraper:
             team_df = team_df.reset_index()
             team_df['salary_millions'] = (team_df['total_salary'] / 1000000).round(1)
             
-            team_file = os.path.join(output_dir, 'nba_team_salaries_2025.json')
-            with open(team_file, 'w', encoding='utf-8') as f:
-                json.dump(team_df.to_dict('records'), f, indent=2, ensure_ascii=False)
+            team_file = os.path.join(output_dir, with_output_format(TEAM_SALARIES_FILENAME, self.output_format))
+            self.write_records_file(team_df, team_file)
             files_created['teams'] = team_file
         
         # 3. 統計サマリー
@@ -348,9 +376,14 @@ class NBAPlayerSalaryScraper:
             team_info = f" ({player['team']})" if player['team'] else ""
             print(f"   {player['final_rank']:2d}. {player['player_name']}{team_info}: ${player['current_salary']:,}")
         
+        # 全ソースが前回から未更新なら既存のJSONをそのまま使う
+        if set(salary_df['source'].unique()) <= self.unchanged_sources:
+            print(f"\n♻️ No upstream changes since the last run, keeping existing JSON files")
+            return
+        
         # JSON保存
         print(f"\n💾 Saving to JSON files...")
-        files_created = self.save_to_json(salary_df)
+        files_created = self.save_to_json(salary_df, self.output_dir)
         
         print(f"\n✅ Files created:")
         for file_type, filepath in files_created.items():
@@ -360,7 +393,13 @@ class NBAPlayerSalaryScraper:
 
 def main():
     """スタンドアロン実行用"""
-    scraper = NBAPlayerSalaryScraper()
+    parser = argparse.ArgumentParser(description='NBA選手のサラリーデータを取得')
+    parser.add_argument('--output-dir', default='nba_data')
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default='json',
+                        help='出力形式（ndjson は1行1レコードで逐次書き込み）')
+    args = parser.parse_args()
+    
+    scraper = NBAPlayerSalaryScraper(output_dir=args.output_dir, output_format=args.format)
     scraper.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+import itertools
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# 改行区切りJSON（1行=1レコード）の拡張子（data/loader.py もこの定義と読み込み処理を使う）
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+# 出力形式と拡張子の対応
+OUTPUT_FORMATS = {'json': '.json', 'ndjson': '.ndjson'}
+
+# 改行区切りJSONを読み書きする行数の単位
+RECORDS_CHUNK_ROWS = 5000
+
+def is_ndjson(filename):
+    """改行区切りJSONのファイルか"""
+    return os.path.splitext(filename)[1].lower() in NDJSON_EXTENSIONS
+
+def with_output_format(filename, output_format):
+    """ファイル名の拡張子を出力形式に合わせる"""
+    return os.path.splitext(filename)[0] + OUTPUT_FORMATS[output_format]
+
+def remove_other_formats(filename):
+    """同名の別形式のファイルを削除（読み込み側は改行区切りJSONを優先するため、古い形式が残ると読まれ続ける）"""
+    root, extension = os.path.splitext(filename)
+    for other in ('.json',) + NDJSON_EXTENSIONS:
+        if other != extension.lower() and os.path.exists(root + other):
+            os.remove(root + other)
+
+def write_records(df, filename, chunk_rows=RECORDS_CHUNK_ROWS):
+    """DataFrameをレコード単位で保存（.ndjson/.jsonl は行数単位で逐次書き込み、別形式の同名ファイルは削除）"""
+    tmp_path = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if is_ndjson(filename):
+            # 全レコードの辞書や文字列を一度に作らず、チャンクごとに書き出す
+            for start in range(0, len(df), chunk_rows):
+                chunk = df.iloc[start:start + chunk_rows].to_json(orient='records', lines=True, force_ascii=False)
+                f.write(chunk if chunk.endswith('\n') else chunk + '\n')
+        else:
+            f.write(df.to_json(orient='records', indent=2))
+    os.replace(tmp_path, filename)
+    remove_other_formats(filename)
+
+def read_records_frame(filename, chunk_rows=RECORDS_CHUNK_ROWS):
+    """write_records で保存したファイルをDataFrameとして読み込み（読めなければ ValueError）"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            if is_ndjson(filename):
+                return read_ndjson_frame(f, chunk_rows)
+            rows = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Unreadable records file: {filename} ({e})")
+    if not isinstance(rows, list):
+        raise ValueError(f"Unreadable records file: {filename}")
+    return pd.DataFrame(rows)
+
+def read_ndjson_frame(f, chunk_rows=RECORDS_CHUNK_ROWS):
+    """改行区切りJSONをチャンクごとにカラム配列へ変換して結合（ファイル全体の辞書のリストを作らない）"""
+    # カラム名 → [(先頭行の位置, 配列)]（チャンクのDataFrameはカラムを取り出したらすぐ手放す）
+    parts = {}
+    row_count = 0
+    while True:
+        chunk = list(itertools.islice(f, chunk_rows))
+        if not chunk:
+            break
+        lines = [line for line in chunk if line.strip()]
+        if not lines:
+            continue
+        # 行ごとに json.loads するより、チャンクを1つの配列としてパースする方が速い
+        chunk_df = pd.DataFrame(json.loads('[' + ','.join(lines) + ']'))
+        for col in chunk_df.columns:
+            # ビューのままだとチャンク全体のブロックが残るためコピー
+            parts.setdefault(col, []).append((row_count, chunk_df[col].to_numpy(copy=True)))
+        row_count += len(chunk_df)
+    return _build_frame_from_chunks(parts, row_count)
+
+def _build_frame_from_chunks(parts, row_count):
+    """チャンクごとのカラム配列を、ファイル全体を一度に変換した場合と同じ型のDataFrameにする"""
+    if not parts:
+        return pd.DataFrame()
+
+    columns = {}
+    # 1カラムずつ結合して元の配列を手放し、ピークを結果 + 1カラム分に抑える
+    for col in list(parts):
+        columns[col] = _combine_column_chunks(parts.pop(col), row_count)
+    # copy=False でブロックを統合せず、結合済みの配列をそのまま保持
+    return pd.DataFrame(columns, copy=False)
+
+def _combine_column_chunks(pieces, row_count):
+    """1カラム分のチャンク配列を結合"""
+    if len({arr.dtype for _, arr in pieces}) == 1 and sum(len(arr) for _, arr in pieces) == row_count:
+        return pieces[0][1] if len(pieces) == 1 else np.concatenate([arr for _, arr in pieces])
+
+    # 一部のチャンクで全て欠損・欠落しているカラムは型が揃わないため、object で埋めてから推論
+    values = np.full(row_count, np.nan, dtype=object)
+    for offset, arr in pieces:
+        values[offset:offset + len(arr)] = arr
+    return pd.Series(values).infer_objects().to_numpy()
@@ -0,0 +1,113 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from table_extractor import LXML_AVAILABLE
+
+if LXML_AVAILABLE:
+    from lxml import html as lxml_html
+
+HOOPSHYPE_TABLE_CLASS = 'hh-salaries-ranking-table'
+
+# 現在のサラリー以降に並ぶ将来のサラリー（最大5年分: salary_year_2〜salary_year_6）
+FUTURE_SALARY_YEARS = 5
+
+# 列ごとの生テキスト（1行=1選手、セルがない箇所はNone）
+HOOPSHYPE_RAW_COLUMNS = ['player_name', 'team', 'current_salary'] + [
+    f'salary_year_{year + 2}' for year in range(FUTURE_SALARY_YEARS)
+]
+
+def clean_salary_column(values):
+    """サラリーテキストの列を整数に一括変換（数字以外を除去、空・'-'・'N/A'等は0）"""
+    digits = pd.Series(values, dtype=object).str.replace(r'[^\d]', '', regex=True)
+    return pd.to_numeric(digits, errors='coerce').fillna(0).astype('int64')
+
+def _empty_columns():
+    # rank は読み飛ばした行も含めた行番号（従来の enumerate と同じ）
+    return {**{col: [] for col in HOOPSHYPE_RAW_COLUMNS}, 'rank': []}
+
+def _append_row(columns, index, name, cell_texts):
+    """cell_texts: 2列目以降（チーム、現在のサラリー、将来のサラリー）のテキスト"""
+    if not name or name.lower() in ['player', 'name']:
+        return
+    columns['player_name'].append(name)
+    columns['rank'].append(index + 1)
+    cell_texts = cell_texts + [None] * (len(HOOPSHYPE_RAW_COLUMNS) - 1 - len(cell_texts))
+    for col, text in zip(HOOPSHYPE_RAW_COLUMNS[1:], cell_texts):
+        columns[col].append(text)
+
+def _extract_with_lxml(html):
+    """lxmlで1回パースし、行を列ごとの生テキストに振り分け"""
+    root = lxml_html.fromstring(html)
+    rows = root.xpath(
+        '//*[contains(concat(" ", normalize-space(@class), " "), $cls)]//tbody//tr',
+        cls=f' {HOOPSHYPE_TABLE_CLASS} '
+    )
+    if not rows:
+        rows = root.xpath('//table//tbody//tr')
+
+    columns = _empty_columns()
+    for i, row in enumerate(rows):
+        cells = row.xpath('.//td')
+        if len(cells) < 3:
+            continue
+        links = cells[0].xpath('.//a')
+        name = (links[0] if links else cells[0]).text_content().strip()
+        texts = [cell.text_content().strip() for cell in cells[1:len(HOOPSHYPE_RAW_COLUMNS)]]
+        _append_row(columns, i, name, texts)
+    return columns, len(rows)
+
+def _extract_with_beautifulsoup(html):
+    """BeautifulSoupで行を列ごとの生テキストに振り分け（lxmlがない環境用）"""
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = soup.select(f'.{HOOPSHYPE_TABLE_CLASS} tbody tr')
+    if not rows:
+        rows = soup.select('table tbody tr')
+
+    columns = _empty_columns()
+    for i, row in enumerate(rows):
+        cells = row.find_all('td')
+        if len(cells) < 3:
+            continue
+        name = (cells[0].find('a') or cells[0]).get_text(strip=True)
+        texts = [cell.get_text(strip=True) for cell in cells[1:len(HOOPSHYPE_RAW_COLUMNS)]]
+        _append_row(columns, i, name, texts)
+    return columns, len(rows)
+
+def build_hoopshype_frame(columns):
+    """列ごとの生テキストからサラリーのDataFrameを作成（選手がいなければNone）"""
+    if not columns['player_name']:
+        return None
+
+    df = pd.DataFrame({
+        'player_name': columns['player_name'],
+        'team': columns['team'],
+        'current_salary': clean_salary_column(columns['current_salary']).to_numpy(),
+        'rank': columns['rank'],
+        'source': 'hoopshype'
+    })
+
+    # 将来のサラリーは0（空欄・'-'等）を欠損とし、値のある年のみカラムを作る
+    for col in HOOPSHYPE_RAW_COLUMNS[3:]:
+        values = clean_salary_column(columns[col]).to_numpy()
+        if (values > 0).any():
+            df[col] = np.where(values > 0, values, np.nan)
+    return df
+
+def parse_hoopshype_salaries(html):
+    """HoopsHypeのサラリーページを解析（戻り値: (DataFrame または None, 行数)）"""
+    if LXML_AVAILABLE:
+        columns, row_count = _extract_with_lxml(html)
+    else:
+        columns, row_count = _extract_with_beautifulsoup(html)
+    return build_hoopshype_frame(columns), row_count
+
+def parse_hoopshype_pages(pages, use_process_pool=False, max_workers=None):
+    """複数ページ（シーズン・チーム別の保存済みHTML等）を解析し、ページ順のDataFrameのリストを返す"""
+    pages = list(pages)
+    # HTMLのパースはGILを解放しないため、ページが多い場合はプロセスを分ける
+    if not use_process_pool or len(pages) < 2:
+        return [parse_hoopshype_salaries(html)[0] for html in pages]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return [df for df, _ in executor.map(parse_hoopshype_salaries, pages)]
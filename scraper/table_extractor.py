@@ -0,0 +1,101 @@
+import pandas as pd
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# メインの統計テーブルの候補（先頭から順に探す）
+STATS_TABLE_IDS = ['stats', 'per_game-team', 'advanced-team', 'play-by-play-team', 'totals-team']
+STATS_TABLE_CLASS = 'stats_table'
+
+def _find_table(root, table_ids):
+    """id → class の順に統計テーブルを探す"""
+    for table_id in table_ids:
+        tables = root.xpath('//table[@id=$table_id]', table_id=table_id)
+        if tables:
+            return tables[0]
+
+    tables = root.xpath('//table[contains(concat(" ", normalize-space(@class), " "), $cls)]', cls=f' {STATS_TABLE_CLASS} ')
+    return tables[0] if tables else None
+
+def _find_commented_table(root, table_ids):
+    """コメントアウトされたテーブル（Basketball-Referenceの遅延描画テーブル）を探す"""
+    for comment in root.iter(etree.Comment):
+        text = comment.text or ''
+        if '<table' not in text:
+            continue
+        table = _find_table(lxml_html.fragment_fromstring(text, create_parent='div'), table_ids)
+        if table is not None:
+            return table
+    return None
+
+def _cell_text(cell):
+    text = cell.text_content().strip()
+    return text if text else None
+
+def _header_names(table):
+    """thead からカラム名を作成（2段ヘッダーは「上段 下段」で結合）"""
+    header_rows = table.xpath('./thead/tr')
+    if not header_rows:
+        return None
+
+    names = [_cell_text(cell) or '' for cell in header_rows[-1].xpath('./th|./td')]
+    if len(header_rows) > 1:
+        # 上段は colspan 分だけ展開して下段に対応付ける
+        over_header = []
+        for cell in header_rows[0].xpath('./th|./td'):
+            over_header.extend([_cell_text(cell) or ''] * int(cell.get('colspan', 1)))
+        names = [
+            f'{top} {name}'.strip() if top else name
+            for top, name in zip(over_header + [''] * len(names), names)
+        ]
+    return names
+
+def _coerce_column(values):
+    """欠損を増やさずに数値化できるカラムは数値型に変換"""
+    series = pd.Series(values, dtype=object)
+    numeric = pd.to_numeric(series, errors='coerce')
+    if numeric.isna().sum() == series.isna().sum():
+        return numeric
+    return series
+
+def extract_stats_table(html, table_ids=None):
+    """ページHTMLから統計テーブルを1回のパースで抽出し、型付きのDataFrameを返す（見つからなければNone）"""
+    table_ids = table_ids or STATS_TABLE_IDS
+    root = lxml_html.fromstring(html)
+
+    table = _find_table(root, table_ids)
+    if table is None:
+        table = _find_commented_table(root, table_ids)
+    if table is None:
+        return None
+
+    columns = _header_names(table)
+    body_rows = table.xpath('./tbody/tr|./tfoot/tr|./tr')
+    if columns is None and body_rows:
+        columns, body_rows = [_cell_text(cell) or '' for cell in body_rows[0].xpath('./th|./td')], body_rows[1:]
+    if not columns:
+        return None
+
+    # カラムごとの値リストに直接詰める（途中で繰り返されるヘッダー行は除外）
+    values = [[] for _ in columns]
+    for row in body_rows:
+        row_class = row.get('class') or ''
+        if 'thead' in row_class or 'over_header' in row_class:
+            continue
+
+        cells = [_cell_text(cell) for cell in row.xpath('./th|./td')]
+        if not any(cells) or cells[0] == columns[0]:
+            continue
+
+        cells = (cells + [None] * len(columns))[:len(columns)]
+        for column_values, cell in zip(values, cells):
+            column_values.append(cell)
+
+    # 同名カラムがあっても列を失わないよう位置で組み立てる
+    df = pd.concat([_coerce_column(column_values) for column_values in values], axis=1, ignore_index=True)
+    df.columns = columns
+    return df.reset_index(drop=True)
@@ -1,3 +1,5 @@
+import re
+import unicodedata
 import pandas as pd
 import numpy as np
 
@@ -10,11 +12,32 @@ def clean_player_names(names):
     else:
         return str(names).strip().title()
 
+# 名前照合時に無視する接尾辞（Jr. / Sr. / II / III / IV）
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv'}
+
+def normalize_player_name(name):
+    """照合用にプレイヤー名を正規化（アクセント除去・小文字化・記号と接尾辞の除去）"""
+    if not isinstance(name, str):
+        return ''
+    
+    # "Dončić" → "doncic"
+    folded = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    # "P.J." → "pj"、"De'Aaron" → "deaaron"、ハイフン等は区切りとして扱う
+    folded = re.sub(r"[.'`]", '', folded)
+    tokens = re.sub(r'[^a-z0-9]+', ' ', folded).split()
+    
+    return ' '.join(token for token in tokens if token not in NAME_SUFFIXES)
+
+def normalize_player_names(names):
+    """プレイヤー名の列を一括正規化（ユニークな名前のみ処理）"""
+    codes, uniques = pd.factorize(pd.Series(names))
+    keys = np.array([normalize_player_name(name) for name in uniques] + [''], dtype=object)
+    # 欠損（コード-1）は末尾の空文字に対応
+    return keys[codes]
+
 def calculate_efficiency_metrics(df, stat_col, salary_col):
     """効率メトリクスの計算"""
-    df = df.copy()
-    
-    # 数値変換
+    # 数値変換（入力のDataFrameは変更しないためコピー不要）
     stat_values = pd.to_numeric(df[stat_col], errors='coerce').fillna(0)
     salary_values = pd.to_numeric(df[salary_col], errors='coerce').fillna(1)
     
@@ -26,6 +49,26 @@ def calculate_efficiency_metrics(df, stat_col, salary_col):
     
     return efficiency
 
+def calculate_efficiency_matrix(df, stat_cols, salary_col, dtype='float32'):
+    """複数の統計値の効率（統計値 / 100万ドル）を行列で一括計算（サラリーが欠損・0以下の行はNaN）"""
+    # 入力のDataFrameはコピーせず、出力用の行列に直接書き込む
+    efficiency = np.empty((len(df), len(stat_cols)), dtype=dtype)
+    for i, col in enumerate(stat_cols):
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors='coerce')
+        efficiency[:, i] = values.to_numpy(dtype='float64', na_value=np.nan)
+    
+    # 統計値の欠損は0として扱う
+    efficiency[np.isnan(efficiency)] = 0
+    
+    salary = pd.to_numeric(df[salary_col], errors='coerce').to_numpy(dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_million = np.where(salary > 0, 1000000 / salary, np.nan)
+    efficiency *= per_million[:, None].astype(dtype)
+    
+    return efficiency
+
 def format_large_numbers(number):
     """大きな数値のフォーマット"""
     if number >= 1000000:
@@ -36,16 +79,168 @@ def format_large_numbers(number):
         return f"{number:.0f}"
 
 def get_percentile_rank(series, value):
-    """パーセンタイル順位の計算"""
-    return (series < value).mean() * 100
+    """パーセンタイル順位の計算（1回の検索用の線形走査。同じカラムを何度も引く場合は RankIndex / build_rank_table）"""
+    values = pd.to_numeric(pd.Series(series), errors='coerce').to_numpy(dtype='float64')
+    if len(values) == 0:
+        return np.nan
+    return float(np.count_nonzero(values < value) / len(values) * 100)
+
+# 2TM、3TM等の複数チーム移籍レコードのチーム表記
+MULTI_TEAM_PATTERN = r'^\d+TM$'
+
+def _multi_team_mask(series):
+    """複数チーム移籍レコードの判定（ユニーク値のみ正規表現で判定してから各行へ展開）"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # カテゴリ型は辞書を判定し、コードで引くだけ（文字列変換なし）
+        categories = series.cat.categories
+        codes = series.cat.codes.to_numpy()
+    else:
+        codes, categories = pd.factorize(series)
+        categories = pd.Index(categories)
+    
+    category_mask = np.asarray(categories.astype(str).str.match(MULTI_TEAM_PATTERN), dtype=bool)
+    # 欠損値（コード -1）は末尾の False を参照
+    return np.append(category_mask, False)[codes]
 
 def filter_multi_team_records(df, team_columns=['Team', 'Tm']):
     """2TM、3TM等の複数チーム移籍レコードを除外"""
-    df_filtered = df.copy()
+    mask = None
     
     for col in team_columns:
-        if col in df_filtered.columns:
-            # 2TM, 3TM, 4TM等のパターンを除外
-            df_filtered = df_filtered[~df_filtered[col].astype(str).str.match(r'^\d+TM$', na=False)]
+        if col in df.columns:
+            col_mask = _multi_team_mask(df[col])
+            mask = col_mask if mask is None else (mask | col_mask)
+    
+    # 除外対象がなければコピーせずそのまま返す
+    if mask is None or not mask.any():
+        return df
+    
+    return df[~mask]
+
+def select_latest_team_records(df, player_col='Player', team_col='Team', total_label='TOT'):
+    """各選手について TOT レコードを優先し、なければ最後のレコードを1行だけ残す"""
+    if player_col not in df.columns or team_col not in df.columns:
+        return df
+    
+    players = df[df[player_col].notna()]
+    if players.empty:
+        return players.reset_index(drop=True)
+    
+    # 安定ソートで「TOT以外 → TOT」の順に並べ替え、各選手の最後の行を採用
+    is_total = (players[team_col] == total_label).to_numpy(dtype=bool)
+    order = np.argsort(is_total, kind='stable')
+    latest = players.iloc[order].drop_duplicates(subset=[player_col], keep='last')
+    
+    return latest.sort_values(player_col, kind='stable').reset_index(drop=True)
+
+class RangeFilterIndex:
+    """数値カラムごとのソート済みインデックスによる範囲フィルタ"""
+    
+    def __init__(self, df, columns, fill_values=None):
+        # fill_values: カラム → 欠損・非数値の置換値（指定なしは常に範囲外）
+        fill_values = fill_values or {}
+        self._length = len(df)
+        self._sorted = {}
+        
+        for col in columns:
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors='coerce')
+            if col in fill_values:
+                values = values.fillna(fill_values[col])
+            values = values.to_numpy(dtype='float64')
+            
+            # NaNはソート後の末尾に集まるため、有効値の件数で範囲を打ち切る
+            order = np.argsort(values, kind='stable')
+            valid_count = len(values) - int(np.isnan(values).sum())
+            self._sorted[col] = (values[order], order, valid_count)
+    
+    def __contains__(self, col):
+        return col in self._sorted
+    
+    def __len__(self):
+        return self._length
+    
+    def all_rows(self):
+        """全行を選択したマスク"""
+        return np.ones(self._length, dtype=bool)
+    
+    def range_mask(self, col, lower=None, upper=None):
+        """lower ≤ 値 ≤ upper の行のマスク（searchsortedによる区間抽出）"""
+        values, order, valid_count = self._sorted[col]
+        start = 0 if lower is None else int(np.searchsorted(values[:valid_count], lower, side='left'))
+        stop = valid_count if upper is None else int(np.searchsorted(values[:valid_count], upper, side='right'))
+        
+        mask = np.zeros(self._length, dtype=bool)
+        mask[order[start:stop]] = True
+        return mask
+    
+    def bounds(self, col, mask=None):
+        """選択行（maskがNoneなら全行）における最小値・最大値（該当なしはNone）"""
+        values, order, valid_count = self._sorted[col]
+        if mask is None:
+            selected = values[:valid_count]
+        else:
+            # ソート順に並べたマスクの先頭・末尾が最小値・最大値
+            selected = values[:valid_count][mask[order[:valid_count]]]
+        if len(selected) == 0:
+            return None
+        return selected[0], selected[-1]
+
+class RankIndex:
+    """数値カラムのソート済み配列による順位・パーセンタイル検索（検索はO(log n)）"""
+    
+    def __init__(self, values):
+        self._values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype='float64')
+        # パーセンタイルの分母は欠損を含む全件
+        self._total = len(self._values)
+        
+        # 昇順（同値は後の行が先）に並べ、降順に辿ると同値は元の行順になる
+        positions = np.arange(self._total)
+        order = np.lexsort((-positions, self._values))
+        valid_count = self._total - int(np.isnan(self._values).sum())
+        self._order = order[:valid_count]
+        self._sorted = self._values[self._order]
+    
+    def __len__(self):
+        return self._total
+    
+    def percentile(self, value):
+        """value未満の割合（%）。配列を渡すとまとめて計算"""
+        if self._total == 0:
+            return np.nan
+        value = np.asarray(value, dtype='float64')
+        below = np.searchsorted(self._sorted, value, side='left')
+        result = np.where(np.isnan(value), 0, below) / self._total * 100
+        return float(result) if result.ndim == 0 else result
+    
+    def rank(self, value):
+        """降順の順位（value より大きい値の件数 + 1、同値は同順位）"""
+        value = np.asarray(value, dtype='float64')
+        above = len(self._sorted) - np.searchsorted(self._sorted, value, side='right')
+        result = np.where(np.isnan(value), np.nan, above + 1)
+        return float(result) if result.ndim == 0 else result
+    
+    def top_k(self, k):
+        """値の大きい順にk件の行位置（同値は元の行順）"""
+        return self._order[::-1][:k]
+    
+    def percentiles(self):
+        """全行のパーセンタイル"""
+        return self.percentile(self._values)
+    
+    def ranks(self):
+        """全行の順位（欠損はNaN）"""
+        return self.rank(self._values)
+
+def build_rank_table(df, columns):
+    """複数スタッツの全選手の順位・パーセンタイルを一括計算（<カラム>_rank / <カラム>_pct）"""
+    table = {}
+    for col in columns:
+        if col not in df.columns:
+            continue
+        index = RankIndex(df[col])
+        table[f'{col}_rank'] = index.ranks()
+        table[f'{col}_pct'] = index.percentiles()
     
-    return df_filtered
+    return pd.DataFrame(table, index=df.index)